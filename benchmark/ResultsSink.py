@@ -0,0 +1,117 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+class ResultsSink:
+    """
+    Append-only columnar storage of evaluation results.
+    Rows are buffered and flushed in batches, every batch is written as a new chunk
+    in which each column is a separate array, so columns can be read back independently.
+    :attribute path: directory with chunks
+    :attribute batch_size: number of buffered rows which triggers a flush
+    """
+
+    CHUNK_PATTERN = 'chunk-*.npz'
+
+    def __init__(self, path, batch_size=1000, append=True):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        if not append and self.path.exists():
+            shutil.rmtree(self.path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.__columns = None
+        self.__rows = []
+        self.__chunks_count = len(list(self.path.glob(self.CHUNK_PATTERN)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    def append(self, row):
+        """
+        :param row: dict from column name to a scalar value, None is stored as NaN,
+        all rows must have the same columns
+        """
+        if self.__columns is None:
+            self.__columns = list(row.keys())
+        elif row.keys() != set(self.__columns):
+            raise ValueError("Row columns {} differ from {}".format(sorted(row.keys()), sorted(self.__columns)))
+        non_scalar_columns = [column for column, value in row.items() if value is not None and np.ndim(value) != 0]
+        if non_scalar_columns:
+            raise ValueError("Row columns {} are not scalars".format(sorted(non_scalar_columns)))
+
+        self.__rows.append({column: np.nan if value is None else value for column, value in row.items()})
+        if len(self.__rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.__rows:
+            return
+
+        columns = {column: np.asarray([row[column] for row in self.__rows]) for column in self.__columns}
+        # Object arrays need pickle, a single one would make the whole directory unreadable
+        object_columns = [column for column, values in columns.items() if values.dtype == object]
+        if object_columns:
+            raise ValueError("Columns {} cannot be stored as plain arrays".format(sorted(object_columns)))
+        chunk_path = self.path / 'chunk-{:06d}.npz'.format(self.__chunks_count)
+        tmp_path = chunk_path.with_name(chunk_path.name + '.tmp')
+        with open(tmp_path, 'wb') as file:
+            np.savez(file, **columns)
+        os.replace(tmp_path, chunk_path)
+
+        self.__chunks_count += 1
+        self.__rows = []
+
+    @staticmethod
+    def read(path, columns=None):
+        """
+        :param path: directory with chunks
+        :param columns: names of columns to read, all columns by default
+        :return: DataFrame with rows of all chunks
+        """
+        frames = []
+        for chunk_path in sorted(Path(path).glob(ResultsSink.CHUNK_PATTERN)):
+            with np.load(chunk_path) as chunk:
+                names = chunk.files if columns is None else columns
+                # Columns missing in a chunk are filled with NaN, as concatenation of all columns does
+                frames.append(pd.DataFrame(
+                    {name: chunk[name] if name in chunk.files else np.nan for name in names},
+                    index=pd.RangeIndex(len(chunk[chunk.files[0]]) if chunk.files else 0)
+                ))
+
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def aggregate(path, by, metrics, quantiles=(0.5,)):
+        """
+        Reads only grouping and metric columns and computes their quantiles
+        :param path: directory with chunks
+        :param by: names of columns to group by
+        :param metrics: names of columns to aggregate
+        :param quantiles: quantiles to compute, median by default
+        :return: DataFrame indexed by groups and quantile with a column per metric
+        """
+        results = ResultsSink.read(path, list(by) + list(metrics))
+        return results.groupby(list(by))[list(metrics)].quantile(list(quantiles))
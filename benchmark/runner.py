@@ -0,0 +1,364 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Runs the perturbation x sequence x solver evaluation grid on a pool of processes.
+
+Every task is a single sample of the grid: one problem (an ICL window or a synthetic
+scene) with one perturbation of its poses, solved by every solver of the spec. Seeds
+are derived from the task parameters only, so tasks can run in any order and on any
+worker. An optional 'decimation' entry of the spec (a strategy spec of
+plane_extractor.decimation or a list of them) reduces points of every plane before
+solving, kept and total points are stored with the results. For real sequences an
+optional 'min_window_score' entry skips windows with frames whose planes do not
+constrain all 6 DoF (see EnoughPlanesDetector.score_normals), and an optional
+'moments_only' flag of the dataset reduces frames to plane moments while they are read
+(EF and BAREG solvers need points). Frames, labels and ground truth poses are
+associated one-to-one by closest timestamps within the optional 'max_time_difference'
+of the dataset (0.02 by default). Synthetic scenes cannot be generated from a seed, so
+they are stored by task seed in the required 'cache_dir' of a synthetic dataset and
+reruns solve the same scenes. Rows of finished tasks are appended to a ResultsSink,
+which is also used to skip them when an interrupted sweep is restarted.
+
+Usage: python -m benchmark.runner benchmark/specs/icl.json results --workers 8
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from tqdm import tqdm
+
+from benchmark.ResultsSink import ResultsSink
+from dataset_loaders.synthetic import generate_samples
+from metrics.ape import ape
+from metrics.rpe import rpe
+from perturbation.perturbation import Perturbation, perturb_trajectory
+from plane_backends.GraphTemplate import GraphTemplate
+from plane_backends.ObservationSet import ObservationSet
+from plane_backends.PlaneStatistics import PlaneStatistics
+from plane_backends.SolverConfig import SolverConfig
+from plane_backends.solver_factory import create_solver_by_name, get_solver_class
+from plane_extractor.decimation import create_strategy, decimate_observations
+from scripts.enough_planes.EnoughPlanesDetector import EnoughPlanesDetector
+
+# Taken from https://www.doc.ic.ac.uk/~ahanda/VaFRIC/codes.html
+ICL_CAMERA = {
+    'width': 640,
+    'height': 480,
+    'cx': 319.50,
+    'cy': 239.50,
+    'fx': 481.20,
+    'fy': -480.00,
+    'scale': 5000,
+}
+
+SYNTHETIC_AXES = ['points_count', 'planes_count', 'point_noise']
+
+# Dataset shared by all tasks of a worker process
+_dataset = None
+# Starts of windows of a real sequence which are allowed to be sampled, by window size
+_window_starts = {}
+
+
+def create_tasks(spec):
+    """
+    :param spec: grid specification
+    :return: list of tasks, every task is a dict of its grid parameters
+    """
+    dataset_spec = spec['dataset']
+    axes = {
+        'perturbation': [list(perturbation) for perturbation in spec['perturbations']],
+        'sequence_size': spec['sequence_sizes'],
+    }
+    if dataset_spec['type'] == 'synthetic':
+        for axis in SYNTHETIC_AXES:
+            axes[axis] = dataset_spec[axis]
+    axes['sample'] = list(range(spec['samples_count']))
+
+    return [dict(zip(axes.keys(), values)) for values in itertools.product(*axes.values())]
+
+
+def validate_spec(spec):
+    """
+    Rejects specs with which every task would fail, before the dataset is loaded
+    :param spec: grid specification
+    """
+    solver_classes = {solver_name: get_solver_class(solver_name) for solver_name in spec['solvers']}
+    if spec['dataset']['type'] == 'synthetic' and spec['dataset'].get('cache_dir') is None:
+        # A restarted sweep would otherwise solve other scenes than the finished part of it
+        raise ValueError("Synthetic datasets need a 'cache_dir' to generate the same scenes on reruns")
+    if spec['dataset'].get('moments_only', False):
+        point_solvers = [solver_name for solver_name, backend in solver_classes.items() if backend.requires_points]
+        if point_solvers:
+            raise ValueError(
+                "Solvers {} need points of planes, but the dataset is moments_only".format(', '.join(point_solvers))
+            )
+        if spec.get('decimation'):
+            raise ValueError("Decimation needs points of planes, but the dataset is moments_only")
+
+
+def task_key(task):
+    return json.dumps(task, sort_keys=True)
+
+
+def task_seed(spec, task):
+    digest = hashlib.sha1(task_key(task).encode()).digest()
+    seed_sequence = np.random.SeedSequence([spec.get('seed', 0), int.from_bytes(digest[:8], 'little')])
+    return int(seed_sequence.generate_state(1)[0])
+
+
+def read_finished_tasks(results_path):
+    """
+    :param results_path: directory of a ResultsSink, it may not exist yet
+    :return: set of keys of tasks which results are already stored
+    """
+    return set(ResultsSink.read(results_path, ['task'])['task'])
+
+
+def load_dataset(dataset_spec):
+    """
+    Loads observations and ground truth poses of a real sequence, synthetic datasets need no loading
+    :param dataset_spec: dataset part of a grid specification
+    :return: observations (an ObservationSet unless only moments are loaded) and ground truth poses,
+    None for synthetic datasets
+    """
+    if dataset_spec['type'] == 'synthetic':
+        return None
+    if dataset_spec['type'] != 'icl':
+        raise ValueError("Unknown dataset type: {}".format(dataset_spec['type']))
+
+    from dataset_loaders.CameraParameters import CameraParameters
+    from dataset_loaders.FrameStream import FrameStream
+    from dataset_loaders.IclTumCompatLoader import IclTumCompatLoader
+    from dataset_loaders.ObservationCache import ObservationCache
+    from dataset_loaders.trajectory import associate, read_tum_trajectory
+
+    loader = IclTumCompatLoader(CameraParameters(**dataset_spec.get('camera', ICL_CAMERA)))
+    cache_dir = dataset_spec.get('cache_dir')
+    max_time_difference = dataset_spec.get('max_time_difference', 0.02)
+    stream = FrameStream(
+        loader,
+        dataset_spec['depth_dir'],
+        dataset_spec['label_dir'],
+        cache=ObservationCache(cache_dir) if cache_dir is not None else None,
+        moments_only=dataset_spec.get('moments_only', False),
+        max_time_difference=max_time_difference
+    )
+    pose_timestamps, poses = read_tum_trajectory(dataset_spec['trajectory'], cache_dir)
+    # Only frames with a ground truth pose close enough in time are used
+    frame_indices, (pose_indices,) = associate(stream.timestamps, [pose_timestamps], max_time_difference)
+    observations_count = dataset_spec['observations_count']
+    frame_indices, pose_indices = frame_indices[:observations_count], pose_indices[:observations_count]
+
+    observations = [frame.observation for frame in stream.iterate_indices(frame_indices)]
+    if stream.moments_only:
+        observations = PlaneStatistics.precompute(observations)
+    else:
+        # Plane statistics are computed once per sequence, windows of the set slice them
+        observations = ObservationSet.from_observations(observations).precompute()
+
+    gt_poses = poses[pose_indices]
+    # Remap poses as the first pose is the origin point
+    gt_poses = list(np.linalg.inv(gt_poses[0]) @ gt_poses)
+
+    return observations, gt_poses
+
+
+def _init_worker(dataset_spec, shared_dataset=None):
+    global _dataset
+    # Forked workers inherit the dataset loaded by the parent process, others attach to its shared copy
+    if _dataset is None:
+        if shared_dataset is not None:
+            descriptor, gt_poses = shared_dataset
+            _dataset = ObservationSet.attach(descriptor), gt_poses
+        else:
+            _dataset = load_dataset(dataset_spec)
+
+
+def _create_problem(spec, task, rng):
+    sequence_size = task['sequence_size']
+    if spec['dataset']['type'] == 'synthetic':
+        (observations, gt_poses), = generate_samples(
+            task['points_count'],
+            task['planes_count'],
+            sequence_size,
+            task['point_noise'],
+            spec['dataset']['bias_noise'],
+            samples_count=1,
+            seed=task_seed(spec, task),
+            cache_dir=spec['dataset']['cache_dir']
+        )
+        return PlaneStatistics.precompute(observations), gt_poses
+
+    observations, gt_poses = _dataset
+    window_starts = _get_window_starts(spec, sequence_size)
+    start = window_starts[rng.integers(0, len(window_starts))]
+    return observations[start:start + sequence_size], gt_poses[start:start + sequence_size]
+
+
+def _decimate(spec, observations, rng):
+    strategy_specs = spec.get('decimation', [])
+    if isinstance(strategy_specs, dict):
+        strategy_specs = [strategy_specs]
+    if not strategy_specs:
+        points_count = sum(
+            PlaneStatistics.of(plane).points_count for observation in observations for plane in observation.values()
+        )
+        return observations, points_count, points_count
+
+    observations, kept_counts = decimate_observations(
+        observations,
+        [create_strategy(strategy_spec) for strategy_spec in strategy_specs],
+        rng
+    )
+    return (
+        observations,
+        sum(kept for counts in kept_counts for kept, _ in counts.values()),
+        sum(total for counts in kept_counts for _, total in counts.values()),
+    )
+
+
+def _get_window_starts(spec, sequence_size):
+    if sequence_size not in _window_starts:
+        observations, _ = _dataset
+        min_window_score = spec.get('min_window_score')
+        if min_window_score is None:
+            window_starts = np.arange(len(observations) - sequence_size + 1)
+        else:
+            # Windows with a frame that cannot constrain all 6 DoF are never solved
+            window_starts = EnoughPlanesDetector.valid_window_starts(observations, sequence_size, min_window_score)
+        if len(window_starts) == 0:
+            raise ValueError("No windows of size {} can be sampled".format(sequence_size))
+        _window_starts[sequence_size] = window_starts
+
+    return _window_starts[sequence_size]
+
+
+def run_task(spec, task):
+    """
+    :param spec: grid specification
+    :param task: grid parameters of a task
+    :return: list of result rows, one per solver
+    """
+    rng = np.random.default_rng(task_seed(spec, task))
+    observations, gt_poses = _create_problem(spec, task, rng)
+    sequence_size = task['sequence_size']
+    observations, points_kept, points_total = _decimate(spec, observations, rng)
+
+    perturbation = Perturbation(*task['perturbation'])
+    perturbed_poses = list(perturb_trajectory(gt_poses, perturbation, rng))
+
+    # Observations are compiled once and shared by all solvers of a task
+    template = GraphTemplate(observations)
+    config = SolverConfig(
+        spec.get('iterations_count', 300),
+        spec.get('damping'),
+        spec.get('tolerance', SolverConfig.DEFAULT_TOLERANCE)
+    )
+    rows = []
+    for solver_name in spec['solvers']:
+        solver = create_solver_by_name(solver_name, config=config)
+        result = solver.solve(template, perturbed_poses)
+        refined_poses = result.trajectory
+        ape_translation, ape_rotation = ape(gt_poses, refined_poses[:sequence_size])
+        rpe_translation, rpe_rotation = rpe(gt_poses, refined_poses[:sequence_size])
+        row = {key: value for key, value in task.items() if key != 'perturbation'}
+        row.update({
+            'task': task_key(task),
+            'solver': solver_name,
+            'pose_perturbation': str(perturbation),
+            'time': result.optimization_time,
+            'iterations': result.iterations_count,
+            'ape_rotation': float(ape_rotation),
+            'rpe_rotation': float(rpe_rotation),
+            'ape_translation': float(ape_translation),
+            'rpe_translation': float(rpe_translation),
+            'points_kept': points_kept,
+            'points_total': points_total,
+        })
+        row.update({'time_' + phase: seconds for phase, seconds in result.timings.items()})
+        rows.append(row)
+
+    return rows
+
+
+def run(spec, results_path, workers_count=None, flush_tasks_count=10):
+    """
+    Runs all tasks of a grid which are not in the results file yet
+    :param spec: grid specification
+    :param results_path: directory of a ResultsSink, results of finished tasks are appended to it
+    :param workers_count: number of worker processes, all cores by default
+    :param flush_tasks_count: number of finished tasks buffered before they are written
+    """
+    global _dataset
+
+    validate_spec(spec)
+    finished_tasks = read_finished_tasks(results_path)
+    tasks = [task for task in create_tasks(spec) if task_key(task) not in finished_tasks]
+    if not tasks:
+        return
+
+    _dataset = load_dataset(spec['dataset'])
+    shared_block, shared_dataset = None, None
+    if (
+            _dataset is not None
+            and isinstance(_dataset[0], ObservationSet)
+            and multiprocessing.get_start_method() != 'fork'
+    ):
+        # Workers which do not inherit the dataset attach to a single shared copy instead of loading it again
+        observations, gt_poses = _dataset
+        shared_block, descriptor = observations.share()
+        shared_dataset = (descriptor, gt_poses)
+
+    try:
+        with ProcessPoolExecutor(
+                max_workers=workers_count,
+                initializer=_init_worker,
+                initargs=(spec['dataset'], shared_dataset)
+        ) as executor, ResultsSink(results_path, batch_size=len(spec['solvers']) * flush_tasks_count) as results:
+            futures = [executor.submit(run_task, spec, task) for task in tasks]
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                try:
+                    rows = future.result()
+                except BaseException:
+                    # Queued tasks are cancelled instead of being solved and thrown away, stored rows are kept
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+                # Batches hold whole tasks, so a task lost on interruption is simply rerun
+                for row in rows:
+                    results.append(row)
+    finally:
+        if shared_block is not None:
+            ObservationSet.release(shared_block)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a grid of backend evaluations in parallel")
+    parser.add_argument('spec', help="path to a JSON grid specification")
+    parser.add_argument('results', help="directory with results, finished tasks are skipped")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes")
+    args = parser.parse_args()
+
+    with open(args.spec, 'r') as file:
+        spec = json.load(file)
+    run(spec, args.results, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measures how backends scale with the number of planes, poses and points per plane.
+
+Every case of the grid is a fixed-seed synthetic planar problem generated with numpy
+only, so the same spec always yields the same problems. Each (case, solver) pair runs
+in a fresh process, so the reported peak memory (ru_maxrss) belongs to that pair alone.
+Times are split into problem preparation (plane statistics and the graph template),
+graph build (init_poses and register_observations phases of the backend) and solve
+(optimize and extract_state phases); every time is the median over repeats.
+Results can be stored as a baseline, later runs are compared with it and cases which
+got slower (or use more memory) than the tolerance allows are reported as regressions.
+Slowdowns are checked on the fastest repeat, which is the least affected by noise.
+
+Usage: python -m benchmark.scaling benchmark/specs/scaling.json results.json --baseline baseline.json
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from metrics.ape import ape
+from perturbation.perturbation import Perturbation, perturb_trajectory
+from plane_backends.GraphTemplate import GraphTemplate
+from plane_backends.PlaneStatistics import PlaneStatistics
+from plane_backends.SolverConfig import SolverConfig
+from plane_backends.solver_factory import create_solver_by_name
+
+CASE_AXES = ['planes_count', 'poses_count', 'points_count']
+# Metrics compared with the baseline, values below the floor are treated as noise
+REGRESSION_METRICS = {
+    'time_build_min': 10e-3,
+    'time_solve_min': 10e-3,
+    'peak_memory_mb': 16,
+}
+
+
+def generate_problem(planes_count, poses_count, points_count, seed, point_noise=0.005):
+    """
+    Generates planes observed from every pose of a random trajectory
+    :param planes_count: number of planes in the scene
+    :param poses_count: number of poses in the trajectory
+    :param points_count: number of points sampled from every plane at every pose
+    :param seed: seed of the problem
+    :param point_noise: standard deviation of the point noise along plane normals
+    :return: list of observations (dicts from plane id to points in the pose frame), Nx4x4 ground truth poses
+    """
+    rng = np.random.default_rng(seed)
+    normals = rng.normal(size=(planes_count, 3))
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    distances = rng.uniform(1, 5, planes_count)
+    # Orthonormal in-plane bases span square patches around the closest point of every plane
+    tangents = np.cross(normals, np.eye(3)[np.argmin(np.abs(normals), axis=1)])
+    tangents /= np.linalg.norm(tangents, axis=1, keepdims=True)
+    bitangents = np.cross(normals, tangents)
+
+    gt_poses = perturb_trajectory(
+        np.repeat(np.eye(4)[np.newaxis], poses_count, axis=0),
+        Perturbation(rotation_shift=10, translation_shift=0.5),
+        rng
+    )
+    observations = []
+    for T in gt_poses:
+        uv = rng.uniform(-1, 1, (planes_count, points_count, 2))
+        noise = rng.normal(0, point_noise, (planes_count, points_count, 1))
+        world_points = (
+            -distances[:, np.newaxis, np.newaxis] * normals[:, np.newaxis]
+            + uv[..., :1] * tangents[:, np.newaxis]
+            + uv[..., 1:] * bitangents[:, np.newaxis]
+            + noise * normals[:, np.newaxis]
+        )
+        local_points = (world_points - T[:3, 3]) @ T[:3, :3]
+        observations.append({plane_id: local_points[plane_id] for plane_id in range(planes_count)})
+
+    return observations, gt_poses
+
+
+def create_cases(spec):
+    """
+    :param spec: benchmark specification with lists of values of every case axis
+    :return: list of dicts with one value of every axis
+    """
+    return [dict(zip(CASE_AXES, values)) for values in itertools.product(*(spec[axis] for axis in CASE_AXES))]
+
+
+def case_key(case, solver_name):
+    return '{0}_{1}_{2}_{3}'.format(solver_name, case['planes_count'], case['poses_count'], case['points_count'])
+
+
+def measure(spec, case, solver_name):
+    """
+    Solves a case several times in the current process
+    :param spec: benchmark specification
+    :param case: values of case axes
+    :param solver_name: name of a solver in solver_factory
+    :return: result row
+    """
+    repeats = spec.get('repeats', 3)
+    if repeats < 1:
+        raise ValueError("At least one repeat is required, got {}".format(repeats))
+
+    seed = spec.get('seed', 0)
+    observations, gt_poses = generate_problem(
+        case['planes_count'],
+        case['poses_count'],
+        case['points_count'],
+        seed,
+        spec.get('point_noise', 0.005)
+    )
+    initial_poses = list(perturb_trajectory(
+        gt_poses,
+        Perturbation(*spec.get('perturbation', [5, 0.05])),
+        np.random.default_rng(seed + 1)
+    ))
+    config = SolverConfig(
+        spec.get('iterations_count', 300),
+        spec.get('damping'),
+        spec.get('tolerance', SolverConfig.DEFAULT_TOLERANCE)
+    )
+
+    timings = {'prepare': [], 'build': [], 'solve': []}
+    for _ in range(repeats):
+        start = time.perf_counter()
+        template = GraphTemplate(PlaneStatistics.precompute(observations))
+        timings['prepare'].append(time.perf_counter() - start)
+
+        result = create_solver_by_name(solver_name, config=config).solve(template, initial_poses)
+        timings['build'].append(result.timings['init_poses'] + result.timings['register_observations'])
+        timings['solve'].append(result.timings['optimize'] + result.timings['extract_state'])
+
+    ape_translation, ape_rotation = ape(gt_poses, result.trajectory[:len(gt_poses)])
+    factors_count = len(template.factors)
+    points_total = case['planes_count'] * case['poses_count'] * case['points_count']
+    time_build = float(np.median(timings['build']))
+    time_solve = float(np.median(timings['solve']))
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2 ** (20 if sys.platform == 'darwin' else 10))
+    return dict(case, **{
+        'solver': solver_name,
+        'factors_count': factors_count,
+        'iterations': int(result.iterations_count),
+        'time_prepare': float(np.median(timings['prepare'])),
+        'time_build': time_build,
+        'time_solve': time_solve,
+        'time_build_min': float(np.min(timings['build'])),
+        'time_solve_min': float(np.min(timings['solve'])),
+        'factors_per_second': factors_count / time_build if time_build > 0 else float('inf'),
+        'points_per_second': points_total / (time_build + time_solve),
+        'iterations_per_second': int(result.iterations_count) / time_solve if time_solve > 0 else float('inf'),
+        'peak_memory_mb': peak_memory,
+        'ape_translation': float(ape_translation),
+        'ape_rotation': float(ape_rotation),
+    })
+
+
+def run(spec):
+    """
+    Measures every (case, solver) pair of a spec, each in a fresh process
+    :param spec: benchmark specification
+    :return: list of result rows
+    """
+    rows = []
+    context = multiprocessing.get_context('spawn')
+    for case in create_cases(spec):
+        for solver_name in spec['solvers']:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                row = executor.submit(measure, spec, case, solver_name).result()
+            print(format_row(row), flush=True)
+            rows.append(row)
+
+    return rows
+
+
+def compare(rows, baseline_rows, tolerance=0.25):
+    """
+    :param rows: result rows of the current run
+    :param baseline_rows: result rows of the baseline run
+    :param tolerance: allowed relative growth of every regression metric
+    :return: list of (case key, metric, baseline value, current value) of regressed metrics
+    """
+    baseline = {case_key(row, row['solver']): row for row in baseline_rows}
+    regressions = []
+    for row in rows:
+        key = case_key(row, row['solver'])
+        if key not in baseline:
+            continue
+        for metric, floor in REGRESSION_METRICS.items():
+            # Baselines stored by older versions may lack a metric
+            if metric not in baseline[key]:
+                continue
+            baseline_value = baseline[key][metric]
+            if row[metric] > max(baseline_value, floor) * (1 + tolerance):
+                regressions.append((key, metric, baseline_value, row[metric]))
+
+    return regressions
+
+
+def format_row(row):
+    return '{0:<40} build {1:9.4f}s  solve {2:9.4f}s  {3:5d} it  {4:12.0f} points/s  {5:8.1f} MB'.format(
+        case_key(row, row['solver']),
+        row['time_build'],
+        row['time_solve'],
+        row['iterations'],
+        row['points_per_second'],
+        row['peak_memory_mb'],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure scaling of backends on synthetic planar problems")
+    parser.add_argument('spec', help="path to a JSON benchmark specification")
+    parser.add_argument('results', help="path to a JSON file to store results in")
+    parser.add_argument('--baseline', default=None, help="path to a JSON file with baseline results")
+    parser.add_argument('--save-baseline', action='store_true', help="store results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed relative slowdown")
+    args = parser.parse_args()
+    if args.save_baseline and args.baseline is None:
+        parser.error("--save-baseline needs the path given by --baseline")
+
+    with open(args.spec, 'r') as file:
+        spec = json.load(file)
+    rows = run(spec)
+    with open(args.results, 'w') as file:
+        json.dump(rows, file, indent=2)
+
+    if args.baseline is None:
+        return
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(rows, file, indent=2)
+        return
+
+    with open(args.baseline, 'r') as file:
+        baseline_rows = json.load(file)
+    regressions = compare(rows, baseline_rows, args.tolerance)
+    for key, metric, baseline_value, value in regressions:
+        print('Regression {0} {1}: {2:.4f} -> {3:.4f}'.format(key, metric, baseline_value, value))
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
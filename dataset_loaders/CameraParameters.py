@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import open3d as o3d
+import numpy as np
 
 
 class CameraParameters:
@@ -26,6 +26,8 @@ class CameraParameters:
         self.scale = scale
 
     def to_o3d_intrinsics(self):
+        import open3d as o3d
+
         intrinsics = o3d.camera.PinholeCameraIntrinsic()
         intrinsics.width, intrinsics.height = self.width, self.height
         intrinsics.intrinsic_matrix = [
@@ -35,3 +37,14 @@ class CameraParameters:
         ]
 
         return intrinsics
+
+    def to_ray_grid(self):
+        """
+        :return: HxWx2 array of (x, y) ray directions at unit depth for every pixel
+        """
+        u = (np.arange(self.width, dtype=np.float64) - self.cx) / self.fx
+        v = (np.arange(self.height, dtype=np.float64) - self.cy) / self.fy
+        rays = np.empty((self.height, self.width, 2))
+        rays[:, :, 0] = u[np.newaxis, :]
+        rays[:, :, 1] = v[:, np.newaxis]
+        return rays
@@ -0,0 +1,29 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+class Frame:
+    """
+    A class to represent a single loaded frame of a sequence
+    :attribute timestamp: timestamp of a frame
+    :attribute observation: dict from plane label to points (or PlaneStatistics) of the plane
+    :attribute points: all points of a frame, None if they were not kept
+    :attribute labels: labels of all points of a frame, None if they were not kept
+    """
+
+    def __init__(self, timestamp, observation, points=None, labels=None):
+        self.timestamp = timestamp
+        self.observation = observation
+        self.points = points
+        self.labels = labels
@@ -0,0 +1,179 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from plane_backends.PlaneStatistics import PlaneStatistics
+
+
+class FrameStore:
+    """
+    Content-addressed on-disk store of frames and sequences of frames.
+    Every frame is written once as a memory-mappable array of points (and optionally
+    per-point labels) named by the hash of its content, so overlapping sequences share files.
+    A sequence is a small JSON manifest with frame references, ground truth and perturbed poses.
+    Layout:
+        frames/<frame_id>.points.npy  Nx3 float64 points
+        frames/<frame_id>.labels.npy  N int64 labels (optional)
+        sequences/<name>.json         {"frames": [...], "gt_poses": [...], "perturbed_poses": [...]}
+    :attribute store_dir: root directory of the store
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, store_dir):
+        self.store_dir = Path(store_dir)
+        self.frames_dir = self.store_dir / 'frames'
+        self.sequences_dir = self.store_dir / 'sequences'
+        self.frames_dir.mkdir(parents=True, exist_ok=True)
+        self.sequences_dir.mkdir(parents=True, exist_ok=True)
+
+    def put_frame(self, points, labels=None):
+        """
+        Stores a frame unless a frame with the same content is already stored
+        :param points: Nx3 array of points
+        :param labels: N array of integer point labels, e.g. packed colors of the point cloud
+        :return: frame id
+        """
+        points = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 3)
+        if labels is not None:
+            labels = np.ascontiguousarray(labels, dtype=np.int64).reshape(-1)
+            if len(labels) != len(points):
+                raise ValueError("Got {0} labels for {1} points".format(len(labels), len(points)))
+
+        digest = hashlib.sha1(str(self.FORMAT_VERSION).encode())
+        digest.update(np.int64(len(points)).tobytes())
+        digest.update(points.tobytes())
+        if labels is not None:
+            digest.update(labels.tobytes())
+        frame_id = digest.hexdigest()
+
+        points_path, labels_path = self.__frame_paths(frame_id)
+        if not points_path.exists():
+            # Points are written last, so a frame is visible only when it is complete
+            if labels is not None:
+                self.__save_atomically(labels_path, labels)
+            self.__save_atomically(points_path, points)
+
+        return frame_id
+
+    def put_observation(self, observation):
+        """
+        Stores points of an observation labeled by plane ids
+        :param observation: dict from integer plane id to points (or PlaneStatistics with points) of the plane
+        :return: frame id
+        """
+        plane_ids = list(observation.keys())
+        planes_points = []
+        for plane_id in plane_ids:
+            plane = observation[plane_id]
+            if isinstance(plane, PlaneStatistics):
+                if not plane.has_points:
+                    raise ValueError(
+                        "Plane {} was built from moments only, FrameStore stores points of planes".format(plane_id)
+                    )
+                plane = plane.points
+            planes_points.append(np.asarray(plane))
+        if not plane_ids:
+            return self.put_frame(np.empty((0, 3)), np.empty(0, dtype=np.int64))
+
+        labels = np.repeat(np.asarray(plane_ids, dtype=np.int64), [len(points) for points in planes_points])
+        return self.put_frame(np.concatenate(planes_points), labels)
+
+    def put_sequence(self, name, frame_ids, gt_poses, perturbed_poses=None):
+        """
+        :param name: name of the sequence
+        :param frame_ids: ids of stored frames in the order of poses
+        :param gt_poses: ground truth 4x4 poses of frames
+        :param perturbed_poses: initial 4x4 poses of frames
+        """
+        frame_ids = list(frame_ids)
+        for frame_id in frame_ids:
+            if not self.__frame_paths(frame_id)[0].exists():
+                raise KeyError("Frame {} is not stored".format(frame_id))
+
+        manifest = {
+            'version': self.FORMAT_VERSION,
+            'frames': frame_ids,
+            'gt_poses': np.asarray(gt_poses, dtype=np.float64).reshape(-1, 4, 4).tolist(),
+        }
+        if perturbed_poses is not None:
+            manifest['perturbed_poses'] = np.asarray(perturbed_poses, dtype=np.float64).reshape(-1, 4, 4).tolist()
+
+        manifest_path = self.__manifest_path(name)
+        tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+        with open(tmp_path, 'w') as file:
+            json.dump(manifest, file)
+        os.replace(tmp_path, manifest_path)
+
+    def sequence_names(self):
+        """
+        :return: sorted names of stored sequences
+        """
+        return sorted(path.stem for path in self.sequences_dir.glob('*.json'))
+
+    def read_sequence(self, name):
+        """
+        :param name: name of the sequence
+        :return: dict with 'frames' ids, 'gt_poses' and 'perturbed_poses' (or None) Nx4x4 arrays
+        """
+        with open(self.__manifest_path(name)) as file:
+            manifest = json.load(file)
+
+        perturbed_poses = manifest.get('perturbed_poses')
+        return {
+            'frames': manifest['frames'],
+            'gt_poses': np.asarray(manifest['gt_poses']).reshape(-1, 4, 4),
+            'perturbed_poses': None if perturbed_poses is None else np.asarray(perturbed_poses).reshape(-1, 4, 4),
+        }
+
+    def load_frame(self, frame_id):
+        """
+        :param frame_id: id of a stored frame
+        :return: memory-mapped points and labels (None if the frame has no labels)
+        """
+        points_path, labels_path = self.__frame_paths(frame_id)
+        points = np.load(points_path, mmap_mode='r')
+        labels = np.load(labels_path, mmap_mode='r') if labels_path.exists() else None
+        return points, labels
+
+    def iterate_sequence(self, name):
+        """
+        Streams frames of a sequence without reading them into memory in advance
+        :param name: name of the sequence
+        :return: generator of (points, labels, gt_pose, perturbed_pose) tuples
+        """
+        sequence = self.read_sequence(name)
+        perturbed_poses = sequence['perturbed_poses']
+        for i, frame_id in enumerate(sequence['frames']):
+            points, labels = self.load_frame(frame_id)
+            yield points, labels, sequence['gt_poses'][i], None if perturbed_poses is None else perturbed_poses[i]
+
+    def __frame_paths(self, frame_id):
+        return self.frames_dir / (frame_id + '.points.npy'), self.frames_dir / (frame_id + '.labels.npy')
+
+    def __manifest_path(self, name):
+        return self.sequences_dir / (name + '.json')
+
+    @staticmethod
+    def __save_atomically(path, array):
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as file:
+            np.save(file, array)
+        os.replace(tmp_path, path)
@@ -0,0 +1,153 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from dataset_loaders.Frame import Frame
+from dataset_loaders.trajectory import associate
+from plane_extractor.plane_extractor import extract_planes_from_labels
+
+
+class FrameStream:
+    """
+    Lazily loads frames of a depth/label sequence in timestamp order.
+    Images are decoded and planes are extracted on a pool of worker threads
+    which reads up to prefetch_count frames ahead of the consumer.
+    Timestamps are parsed from file names without the extension, depth and label images are paired
+    one-to-one by closest timestamps within max_time_difference.
+    If an ObservationCache is given, extracted planes are read from and stored in it.
+    With moments_only, frames hold PlaneStatistics accumulated straight from the images,
+    which is enough for pi-factor and landmark backends, but not for EF and BAREG ones.
+    :attribute timestamps: timestamps of depth images which have a label image
+    :attribute depth_paths: depth image of every frame
+    :attribute label_paths: label image of every frame
+    """
+
+    def __init__(
+            self,
+            loader,
+            depth_dir,
+            label_dir,
+            workers_count=4,
+            prefetch_count=8,
+            min_points_count=1000,
+            keep_points=False,
+            cache=None,
+            moments_only=False,
+            max_time_difference=0.02
+    ):
+        if workers_count < 1 or prefetch_count < 1:
+            raise ValueError("workers_count and prefetch_count must be positive")
+        if moments_only and keep_points:
+            raise ValueError("Points cannot be kept when only moments of planes are loaded")
+
+        self.loader = loader
+        self.workers_count = workers_count
+        self.prefetch_count = prefetch_count
+        self.min_points_count = min_points_count
+        self.keep_points = keep_points
+        self.cache = cache
+        self.moments_only = moments_only
+        self.timestamps, self.depth_paths, self.label_paths = self.__list_frames(
+            depth_dir, label_dir, max_time_difference
+        )
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __iter__(self):
+        return self.iterate()
+
+    def iterate(self, start=0, stop=None):
+        """
+        :param start: index of the first frame to load
+        :param stop: index after the last frame to load, all remaining frames by default
+        :return: generator of Frame objects in timestamp order
+        """
+        return self.iterate_indices(range(*slice(start, stop).indices(len(self))))
+
+    def iterate_indices(self, indices):
+        """
+        :param indices: indices of frames to load, e.g. frames associated with poses
+        :return: generator of Frame objects in the order of indices
+        """
+        indices = iter(indices)
+        executor = ThreadPoolExecutor(max_workers=self.workers_count)
+        pending = collections.deque()
+        try:
+            for index in indices:
+                pending.append(executor.submit(self.__load_frame, index))
+                if len(pending) == self.prefetch_count:
+                    break
+
+            while pending:
+                frame = pending.popleft().result()
+                next_index = next(indices, None)
+                if next_index is not None:
+                    pending.append(executor.submit(self.__load_frame, next_index))
+                yield frame
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def __load_frame(self, index):
+        depth_path, label_path = self.depth_paths[index], self.label_paths[index]
+        if self.moments_only:
+            # Moments are as cheap to compute as cached points are to read, so they are not cached
+            observation = self.loader.load_plane_statistics(depth_path, label_path, self.min_points_count)
+            return Frame(self.timestamps[index], observation)
+
+        # Cached frames have no full cloud, so it is reloaded when points have to be kept
+        if self.cache is not None and not self.keep_points:
+            observation = self.cache.get(depth_path, label_path, self.__extraction_parameters())
+            if observation is not None:
+                return Frame(self.timestamps[index], observation)
+
+        points, labels = self.loader.load_points_and_labels(depth_path, label_path)
+        observation = extract_planes_from_labels(points, labels, self.min_points_count)
+        if self.cache is not None:
+            self.cache.put(depth_path, label_path, self.__extraction_parameters(), observation)
+        if not self.keep_points:
+            # Plane points are copies, so the full cloud can be released right away
+            points, labels = None, None
+
+        return Frame(self.timestamps[index], observation, points, labels)
+
+    def __extraction_parameters(self):
+        return {
+            'camera': vars(self.loader.camera),
+            'depth_trunc': self.loader.DEPTH_TRUNC,
+            'min_points_count': self.min_points_count,
+        }
+
+    @staticmethod
+    def __list_frames(depth_dir, label_dir, max_time_difference):
+        depth_timestamps, depth_paths = FrameStream.__paths_by_timestamp(depth_dir)
+        label_timestamps, label_paths = FrameStream.__paths_by_timestamp(label_dir)
+        depth_indices, (label_indices,) = associate(depth_timestamps, [label_timestamps], max_time_difference)
+
+        return (
+            [depth_timestamps[i] for i in depth_indices],
+            [depth_paths[i] for i in depth_indices],
+            [label_paths[i] for i in label_indices],
+        )
+
+    @staticmethod
+    def __paths_by_timestamp(directory):
+        # Names are either frame numbers (ICL) or seconds with a fractional part (TUM)
+        paths = sorted(
+            (float(path.stem), path) for path in Path(directory).iterdir() if path.is_file()
+        )
+        return [timestamp for timestamp, _ in paths], [path for _, path in paths]
@@ -13,16 +13,25 @@
 # limitations under the License.
 
 import numpy as np
-import open3d as o3d
+
+from plane_backends.PlaneStatistics import PlaneStatistics
+from plane_extractor.plane_extractor import UNLABELED, colors_to_labels
+from plane_extractor.plane_fitting import accumulate_moments
 
 
 class IclTumCompatLoader:
+    DEPTH_TRUNC = 100
+
     def __init__(self, camera):
         self.camera = camera
         self.color_to_plane_id = {}
         self.id_counter = 0
+        # Back-projection rays are shared by all frames of the camera
+        self.ray_grid = camera.to_ray_grid()
 
     def load_point_cloud(self, depth_path, label_path):
+        import open3d as o3d
+
         color_raw = o3d.io.read_image(str(label_path))
         depth_raw = o3d.io.read_image(str(depth_path))
         rgbd_image = o3d.geometry.RGBDImage.create_from_color_and_depth(
@@ -30,7 +39,7 @@ class IclTumCompatLoader:
             depth_raw,
             convert_rgb_to_intensity=False,
             depth_scale=self.camera.scale,
-            depth_trunc=100
+            depth_trunc=self.DEPTH_TRUNC
         )
 
         intrinsic = o3d.camera.PinholeCameraIntrinsic()
@@ -49,3 +58,66 @@ class IclTumCompatLoader:
             [0, 0, 0, 1]]))
         
         return point_cloud
+
+    def load_points_and_labels(self, depth_path, label_path):
+        """
+        Back-projects a depth image without building an Open3D point cloud
+        :param depth_path: path to the depth image
+        :param label_path: path to the label image, single color --- single plane
+        :return: Nx3 array of points and N array of integer labels aligned with them,
+        points are in the same order as in load_point_cloud
+        """
+        depth = self.__read_depth(depth_path)
+        labels = self.__read_labels(label_path)
+
+        valid = depth > 0
+        z = depth[valid]
+        rays = self.ray_grid[valid]
+        points = np.empty((len(z), 3))
+        np.multiply(rays[:, 0], z, out=points[:, 0])
+        np.multiply(rays[:, 1], z, out=points[:, 1])
+        points[:, 2] = z
+
+        return points, labels[valid]
+
+    def load_plane_statistics(self, depth_path, label_path, min_points_count=1000):
+        """
+        Accumulates moments of every plane straight from the images without building points of a frame
+        :param depth_path: path to the depth image
+        :param label_path: path to the label image, single color --- single plane
+        :param min_points_count: planes with no more points than this are dropped
+        :return: dict from integer label to PlaneStatistics built from moments only,
+        the same planes as extract_planes_from_labels gives for load_points_and_labels
+        """
+        depth = self.__read_depth(depth_path)
+        labels = self.__read_labels(label_path)
+
+        valid = (depth > 0) & (labels != UNLABELED)
+        plane_labels, segment_ids = np.unique(labels[valid], return_inverse=True)
+        z = depth[valid]
+        coordinates = (self.ray_grid[:, :, 0][valid] * z, self.ray_grid[:, :, 1][valid] * z, z)
+        S = accumulate_moments(coordinates, segment_ids, len(plane_labels))
+
+        kept = S[:, 3, 3] > min_points_count
+        return {int(label): PlaneStatistics(S=plane_S) for label, plane_S in zip(plane_labels[kept], S[kept])}
+
+    def __read_depth(self, depth_path):
+        depth = np.asarray(_read_image(depth_path), dtype=np.float64) / self.camera.scale
+        depth[depth > self.DEPTH_TRUNC] = 0
+        return depth
+
+    @staticmethod
+    def __read_labels(label_path):
+        image = np.asarray(_read_image(label_path))
+        if image.ndim == 2:
+            return image.astype(np.int64)
+
+        height, width = image.shape[:2]
+        return colors_to_labels(image[:, :, :3].reshape(-1, 3)).reshape(height, width)
+
+
+def _read_image(path):
+    # Open3D is imported only when images are actually read
+    import open3d as o3d
+
+    return o3d.io.read_image(str(path))
@@ -0,0 +1,108 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+class ObservationCache:
+    """
+    On-disk cache of per-frame plane observations.
+    Every entry is stored as an array with the points of all planes
+    and a small index array with (label, start, end) rows.
+    Entries are keyed by the identity (path, size, modification time) of the source
+    images and by the extraction parameters, so changing either invalidates them.
+    :attribute cache_dir: directory with cached entries
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, depth_path, label_path, parameters):
+        """
+        :param depth_path: path to the depth image of a frame
+        :param label_path: path to the label image of a frame
+        :param parameters: JSON-serializable parameters used to extract planes
+        :return: dict from plane label to points, None if there is no valid entry
+        """
+        points_path, planes_path = self.__entry_paths(depth_path, label_path, parameters)
+        if not planes_path.exists():
+            return None
+
+        # Points are read eagerly, a memory map per frame would keep a file open for every cached frame
+        points = np.load(points_path)
+        planes = np.load(planes_path)
+        return {int(label): points[start:end] for label, start, end in planes}
+
+    def put(self, depth_path, label_path, parameters, observation):
+        """
+        Stores an observation and removes entries of the frame created from other sources or parameters
+        :param depth_path: path to the depth image of a frame
+        :param label_path: path to the label image of a frame
+        :param parameters: JSON-serializable parameters used to extract planes
+        :param observation: dict from integer plane label to points of the plane
+        """
+        points_path, planes_path = self.__entry_paths(depth_path, label_path, parameters)
+        for stale_path in self.cache_dir.glob(self.__frame_prefix(depth_path) + '-*'):
+            if stale_path not in (points_path, planes_path):
+                stale_path.unlink(missing_ok=True)
+
+        labels = list(observation.keys())
+        counts = np.asarray([len(observation[label]) for label in labels], dtype=np.int64)
+        ends = np.cumsum(counts)
+        planes = np.column_stack([np.asarray(labels, dtype=np.int64), ends - counts, ends]).reshape(-1, 3)
+        points = (
+            np.concatenate([observation[label] for label in labels]).astype(np.float64, copy=False)
+            if labels else np.empty((0, 3))
+        )
+
+        # The index is written last, so an entry is visible only when it is complete
+        self.__save_atomically(points_path, points)
+        self.__save_atomically(planes_path, planes)
+
+    def __entry_paths(self, depth_path, label_path, parameters):
+        key = self.__hash({
+            'version': self.FORMAT_VERSION,
+            'sources': [self.__file_identity(depth_path), self.__file_identity(label_path)],
+            'parameters': parameters,
+        })
+        name = '{0}-{1}'.format(self.__frame_prefix(depth_path), key)
+        return self.cache_dir / (name + '.points.npy'), self.cache_dir / (name + '.planes.npy')
+
+    @staticmethod
+    def __frame_prefix(depth_path):
+        return ObservationCache.__hash(str(Path(depth_path).resolve()))
+
+    @staticmethod
+    def __file_identity(path):
+        stat = os.stat(path)
+        return [str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns]
+
+    @staticmethod
+    def __hash(value):
+        return hashlib.sha1(json.dumps(value, sort_keys=True).encode()).hexdigest()[:16]
+
+    @staticmethod
+    def __save_atomically(path, array):
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as file:
+            np.save(file, array)
+        os.replace(tmp_path, path)
@@ -0,0 +1,136 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from plane_extractor.plane_extractor import group_points_by_labels
+
+
+def generated_data_to_observations(generated_data, poses_count):
+    """
+    :param generated_data: mrob.registration.CreatePoints instance
+    :param poses_count: number of poses to convert
+    :return: list of dicts from plane id to points of the plane
+    """
+    return _sample_to_observations(_generated_data_to_sample(generated_data, poses_count))
+
+
+def generate_samples(
+        points_count,
+        planes_count,
+        poses_count,
+        point_noise,
+        bias_noise,
+        samples_count,
+        seed=0,
+        workers_count=1,
+        cache_dir=None
+):
+    """
+    Generates synthetic planar sequences with mrob CreatePoints.
+    CreatePoints draws from its own unseeded generator, so the seed only names a set of
+    samples: together with the parameters it is the key of cached samples, which makes
+    the set reproducible once it is stored.
+    :param points_count: number of points per plane
+    :param planes_count: number of planes
+    :param poses_count: number of poses
+    :param point_noise: noise of points along plane normals
+    :param bias_noise: noise of plane biases
+    :param samples_count: number of samples to generate
+    :param seed: identifier of the set of samples
+    :param workers_count: number of worker processes generating samples
+    :param cache_dir: directory with cached samples, samples are not cached by default
+    :return: list of (observations, ground truth poses) tuples
+    """
+    parameters = [points_count, planes_count, poses_count, point_noise, bias_noise]
+    cache_paths = [
+        None if cache_dir is None else _cache_path(cache_dir, parameters, seed, sample_index)
+        for sample_index in range(samples_count)
+    ]
+    samples = [_load_sample(path) if path is not None and path.exists() else None for path in cache_paths]
+
+    missing_indices = [i for i, sample in enumerate(samples) if sample is None]
+    if workers_count > 1 and len(missing_indices) > 1:
+        with ProcessPoolExecutor(max_workers=workers_count) as executor:
+            generated = list(executor.map(_generate_sample, [parameters] * len(missing_indices)))
+    else:
+        generated = [_generate_sample(parameters) for _ in missing_indices]
+
+    for sample_index, sample in zip(missing_indices, generated):
+        samples[sample_index] = sample
+        if cache_paths[sample_index] is not None:
+            _save_sample(cache_paths[sample_index], sample)
+
+    return [(_sample_to_observations(sample), list(sample['trajectory'])) for sample in samples]
+
+
+def _generate_sample(parameters):
+    import mrob
+
+    points_count, planes_count, poses_count, point_noise, bias_noise = parameters
+    generated_data = mrob.registration.CreatePoints(
+        planes_count * points_count,
+        planes_count,
+        poses_count,
+        point_noise,
+        bias_noise,
+        mrob.geometry.SE3(np.eye(4))
+    )
+    sample = _generated_data_to_sample(generated_data, poses_count)
+    sample['trajectory'] = np.asarray([T.T() for T in generated_data.get_trajectory()])
+    return sample
+
+
+def _generated_data_to_sample(generated_data, poses_count):
+    points = [np.vstack(generated_data.get_point_cloud(i)) for i in range(poses_count)]
+    labels = [np.asarray(generated_data.get_point_plane_ids(i), dtype=np.int64) for i in range(poses_count)]
+    return {
+        'points': np.concatenate(points),
+        'labels': np.concatenate(labels),
+        'pose_offsets': np.cumsum([0] + [len(pose_points) for pose_points in points]),
+    }
+
+
+def _sample_to_observations(sample):
+    points, labels, pose_offsets = sample['points'], sample['labels'], sample['pose_offsets']
+    observations = []
+    for start, end in zip(pose_offsets[:-1], pose_offsets[1:]):
+        # Every plane id is a plane, including 0, and planes are kept regardless of size
+        groups = group_points_by_labels(points[start:end], labels[start:end], min_points_count=0, unlabeled=None)
+        observations.append({label: plane_points for label, (_, plane_points) in groups.items()})
+    return observations
+
+
+def _cache_path(cache_dir, parameters, seed, sample_index):
+    key = hashlib.sha1(json.dumps([parameters, seed, sample_index]).encode()).hexdigest()[:16]
+    return Path(cache_dir) / (key + '.npz')
+
+
+def _load_sample(path):
+    with np.load(path) as sample:
+        return {name: sample[name] for name in sample.files}
+
+
+def _save_sample(path, sample):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as file:
+        np.savez(file, **sample)
+    os.replace(tmp_path, path)
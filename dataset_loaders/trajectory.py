@@ -0,0 +1,151 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+TRAJECTORY_CACHE_VERSION = 1
+
+
+def quaternions_to_rotations(quaternions):
+    """
+    :param quaternions: Nx4 array of quaternions in [qx, qy, qz, qw] order, they are normalized
+    :return: Nx3x3 array of rotation matrices
+    """
+    quaternions = np.asarray(quaternions, dtype=np.float64).reshape(-1, 4)
+    quaternions = quaternions / np.linalg.norm(quaternions, axis=1, keepdims=True)
+    x, y, z, w = quaternions.T
+
+    rotations = np.empty((len(quaternions), 3, 3))
+    rotations[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    rotations[:, 0, 1] = 2 * (x * y - z * w)
+    rotations[:, 0, 2] = 2 * (x * z + y * w)
+    rotations[:, 1, 0] = 2 * (x * y + z * w)
+    rotations[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    rotations[:, 1, 2] = 2 * (y * z - x * w)
+    rotations[:, 2, 0] = 2 * (x * z - y * w)
+    rotations[:, 2, 1] = 2 * (y * z + x * w)
+    rotations[:, 2, 2] = 1 - 2 * (x * x + y * y)
+    return rotations
+
+
+def read_tum_trajectory(traj_path, cache_dir=None):
+    """
+    Parses a trajectory in TUM (freiburg) format: 'timestamp tx ty tz qx qy qz qw' lines, '#' starts a comment
+    :param traj_path: path to a trajectory file
+    :param cache_dir: directory to keep parsed trajectories in, entries are invalidated when the file changes
+    :return: N array of timestamps and Nx4x4 array of poses
+    """
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = Path(cache_dir) / (_trajectory_cache_key(traj_path) + '.npz')
+        if cache_path.exists():
+            with np.load(cache_path) as cached:
+                return cached['timestamps'], cached['poses']
+
+    # Rows with different numbers of values are rejected by loadtxt itself
+    values = np.loadtxt(traj_path, comments='#', ndmin=2)
+    if values.shape[1] != 8:
+        raise ValueError("Trajectory {} has {} columns instead of 8".format(traj_path, values.shape[1]))
+
+    timestamps = values[:, 0]
+    poses = np.zeros((len(values), 4, 4))
+    poses[:, :3, :3] = quaternions_to_rotations(values[:, 4:8])
+    poses[:, :3, 3] = values[:, 1:4]
+    poses[:, 3, 3] = 1
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+        with open(tmp_path, 'wb') as file:
+            np.savez(file, timestamps=timestamps, poses=poses)
+        os.replace(tmp_path, cache_path)
+
+    return timestamps, poses
+
+
+def read_poses_icl_tum_compat(traj_path):
+    """
+    :param traj_path: path to a trajectory in TUM (freiburg) format
+    :return: list of 4x4 poses
+    """
+    _, poses = read_tum_trajectory(traj_path)
+    return list(poses)
+
+
+def associate_timestamps(reference_timestamps, timestamps, max_difference):
+    """
+    Matches timestamps of a stream to reference timestamps one-to-one as associate.py of the TUM benchmark does:
+    pairs within max_difference are taken greedily from the closest one, every timestamp is used at most once
+    :param reference_timestamps: N array of timestamps to associate
+    :param timestamps: M array of timestamps of a stream
+    :param max_difference: largest allowed difference between associated timestamps
+    :return: N array of indices in timestamps, -1 where no timestamp is left close enough
+    """
+    reference_timestamps = np.asarray(reference_timestamps, dtype=np.float64)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    indices = np.full(len(reference_timestamps), -1, dtype=np.int64)
+    if len(timestamps) == 0:
+        return indices
+
+    order = np.argsort(timestamps, kind='stable')
+    sorted_timestamps = timestamps[order]
+    # Candidates of every reference timestamp are a contiguous range of sorted timestamps
+    starts = np.searchsorted(sorted_timestamps, reference_timestamps - max_difference, side='left')
+    counts = np.searchsorted(sorted_timestamps, reference_timestamps + max_difference, side='right') - starts
+    reference_indices = np.repeat(np.arange(len(reference_timestamps)), counts)
+    candidates = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - starts, counts)
+    stream_indices = order[candidates]
+    differences = np.abs(timestamps[stream_indices] - reference_timestamps[reference_indices])
+
+    within = differences <= max_difference
+    reference_indices, stream_indices, differences = (
+        reference_indices[within], stream_indices[within], differences[within]
+    )
+    used = np.zeros(len(timestamps), dtype=bool)
+    for k in np.lexsort((stream_indices, reference_indices, differences)):
+        reference_index, stream_index = reference_indices[k], stream_indices[k]
+        if indices[reference_index] < 0 and not used[stream_index]:
+            indices[reference_index] = stream_index
+            used[stream_index] = True
+    return indices
+
+
+def associate(reference_timestamps, streams_timestamps, max_difference):
+    """
+    Associates several streams (e.g. labels and poses) with a reference stream (e.g. depth images)
+    :param reference_timestamps: N array of timestamps of the reference stream
+    :param streams_timestamps: list of timestamp arrays of other streams
+    :param max_difference: largest allowed difference between associated timestamps
+    :return: indices of reference timestamps associated with all streams and a list of
+    indices of the associated timestamps in every stream
+    """
+    streams_indices = [
+        associate_timestamps(reference_timestamps, timestamps, max_difference) for timestamps in streams_timestamps
+    ]
+    associated = np.ones(len(reference_timestamps), dtype=bool)
+    for indices in streams_indices:
+        associated &= indices >= 0
+
+    return np.flatnonzero(associated), [indices[associated] for indices in streams_indices]
+
+
+def _trajectory_cache_key(traj_path):
+    stat = os.stat(traj_path)
+    identity = [TRAJECTORY_CACHE_VERSION, str(Path(traj_path).resolve()), stat.st_size, stat.st_mtime_ns]
+    return hashlib.sha1(json.dumps(identity).encode()).hexdigest()[:16]
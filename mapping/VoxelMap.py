@@ -0,0 +1,134 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+
+class VoxelMap:
+    """
+    Incremental map of running per-voxel averages of points (and optionally colors).
+    Voxels are stored in a persistent hash from packed voxel coordinates, so inserting
+    a frame costs O(points in frame) regardless of the size of the map.
+    :attribute voxel_size: edge length of a voxel
+    :attribute with_colors: whether colors are averaged together with points
+    """
+
+    AXIS_BITS = 21
+    AXIS_OFFSET = 1 << (AXIS_BITS - 1)
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, voxel_size, with_colors=False):
+        if voxel_size <= 0:
+            raise ValueError("Voxel size must be positive")
+
+        self.voxel_size = voxel_size
+        self.with_colors = with_colors
+        self.__voxel_slots = {}
+        self.__counts = np.zeros(self.INITIAL_CAPACITY, dtype=np.int64)
+        self.__point_sums = np.zeros((self.INITIAL_CAPACITY, 3))
+        self.__color_sums = np.zeros((self.INITIAL_CAPACITY, 3)) if with_colors else None
+
+    def __len__(self):
+        return len(self.__voxel_slots)
+
+    def insert(self, points, T=None, colors=None):
+        """
+        :param points: Nx3 array of points in the frame of a sensor
+        :param T: 4x4 pose of the sensor, identity by default
+        :param colors: Nx3 array of colors, required if the map is built with colors
+        """
+        if self.with_colors != (colors is not None):
+            raise ValueError("Colors must be provided if and only if the map is built with colors")
+
+        points = np.asarray(points, dtype=np.float64)
+        if T is not None:
+            points = points @ T[:3, :3].T + T[:3, 3]
+
+        keys, inverse = np.unique(self.__voxel_keys(points), return_inverse=True)
+        inverse = inverse.reshape(-1)
+        frame_counts = np.bincount(inverse, minlength=len(keys))
+        slots = np.asarray(
+            [self.__voxel_slots.setdefault(key, len(self.__voxel_slots)) for key in keys.tolist()],
+            dtype=np.int64
+        )
+        self.__reserve(len(self.__voxel_slots))
+
+        # Slots of a frame are unique, so buffered fancy-index addition is exact
+        self.__counts[slots] += frame_counts
+        self.__point_sums[slots] += self.__sum_by_voxel(points, inverse, len(keys))
+        if self.with_colors:
+            self.__color_sums[slots] += self.__sum_by_voxel(np.asarray(colors, dtype=np.float64), inverse, len(keys))
+
+    def points(self):
+        """
+        :return: Mx3 array of average points of all voxels
+        """
+        size = len(self)
+        return self.__point_sums[:size] / self.__counts[:size, np.newaxis]
+
+    def colors(self):
+        """
+        :return: Mx3 array of average colors of all voxels, aligned with points
+        """
+        if not self.with_colors:
+            raise ValueError("Map is built without colors")
+        size = len(self)
+        return self.__color_sums[:size] / self.__counts[:size, np.newaxis]
+
+    def to_point_cloud(self):
+        """
+        :return: Open3D point cloud of the map
+        """
+        import open3d as o3d
+
+        point_cloud = o3d.geometry.PointCloud()
+        point_cloud.points = o3d.utility.Vector3dVector(self.points())
+        if self.with_colors:
+            point_cloud.colors = o3d.utility.Vector3dVector(self.colors())
+        return point_cloud
+
+    def __voxel_keys(self, points):
+        coordinates = np.floor(points / self.voxel_size).astype(np.int64) + self.AXIS_OFFSET
+        if coordinates.size and (coordinates.min() < 0 or coordinates.max() >= 1 << self.AXIS_BITS):
+            raise ValueError("Points are too far from the origin for the voxel size")
+        return (
+            (coordinates[:, 0] << (2 * self.AXIS_BITS))
+            | (coordinates[:, 1] << self.AXIS_BITS)
+            | coordinates[:, 2]
+        )
+
+    def __reserve(self, size):
+        capacity = len(self.__counts)
+        if size <= capacity:
+            return
+
+        while capacity < size:
+            capacity *= 2
+        self.__counts = self.__grow(self.__counts, capacity)
+        self.__point_sums = self.__grow(self.__point_sums, capacity)
+        if self.with_colors:
+            self.__color_sums = self.__grow(self.__color_sums, capacity)
+
+    @staticmethod
+    def __grow(array, capacity):
+        grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    @staticmethod
+    def __sum_by_voxel(values, inverse, voxels_count):
+        return np.stack(
+            [np.bincount(inverse, values[:, axis], voxels_count) for axis in range(3)],
+            axis=1
+        )
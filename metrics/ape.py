@@ -12,21 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import copy
-
-import mrob
-import numpy as np
+from metrics.se3 import as_poses_array, inverse, rmse, rotation_distance, translation_distance
 
 
 def ape(traj_gt_, traj_est_):
-    traj_gt = [np.linalg.inv(traj_gt_[0]) @ T for T in copy.deepcopy(traj_gt_)]
-    traj_est = [np.linalg.inv(traj_est_[0]) @ T for T in copy.deepcopy(traj_est_)]
-    dTs = [np.linalg.inv(traj_gt[i]) @ traj_est[i] for i in range(len(traj_gt))]
-
-    transl_err = []
-    rot_err = []
-    for dT in dTs:
-        transl_err.append(mrob.geometry.SE3(dT).distance_trans() ** 2)
-        rot_err.append(mrob.geometry.SE3(dT).distance_rotation() ** 2)
-    return np.mean(transl_err) ** 0.5, np.mean(rot_err) ** 0.5
+    """
+    Absolute pose error, trajectories are aligned by their first poses
+    :param traj_gt_: ground truth poses, (N, 4, 4) or a batch of runs (..., N, 4, 4)
+    :param traj_est_: estimated poses, broadcastable with traj_gt_
+    :return: translation and rotation RMSE, scalars or arrays of the batch shape
+    """
+    traj_gt = as_poses_array(traj_gt_)
+    traj_est = as_poses_array(traj_est_)
+    traj_gt = inverse(traj_gt[..., :1, :, :]) @ traj_gt
+    traj_est = inverse(traj_est[..., :1, :, :]) @ traj_est
+    dTs = inverse(traj_gt) @ traj_est
 
+    return rmse(translation_distance(dTs)), rmse(rotation_distance(dTs))
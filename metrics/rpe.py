@@ -12,18 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import mrob
-import numpy as np
+from metrics.se3 import as_poses_array, inverse, rmse, rotation_distance, translation_distance
 
 
 def rpe(traj_gt, traj_est):
-    dT_traj_gt = [np.linalg.inv(traj_gt[i]) @ traj_gt[i + 1] for i in range(len(traj_gt) - 1)]
-    dT_traj_est = [np.linalg.inv(traj_est[i]) @ traj_est[i + 1] for i in range(len(traj_est) - 1)]
-    dTs = [np.linalg.inv(dT_traj_gt[i]) @ dT_traj_est[i] for i in range(len(dT_traj_gt))]
+    """
+    Relative pose error between consecutive poses
+    :param traj_gt: ground truth poses, (N, 4, 4) or a batch of runs (..., N, 4, 4)
+    :param traj_est: estimated poses, broadcastable with traj_gt
+    :return: translation and rotation RMSE, scalars or arrays of the batch shape
+    """
+    traj_gt = as_poses_array(traj_gt)
+    traj_est = as_poses_array(traj_est)
+    dT_traj_gt = inverse(traj_gt[..., :-1, :, :]) @ traj_gt[..., 1:, :, :]
+    dT_traj_est = inverse(traj_est[..., :-1, :, :]) @ traj_est[..., 1:, :, :]
+    dTs = inverse(dT_traj_gt) @ dT_traj_est
 
-    transl_err = []
-    rot_err = []
-    for dT in dTs:
-        transl_err.append(mrob.geometry.SE3(dT).distance_trans() ** 2)
-        rot_err.append(mrob.geometry.SE3(dT).distance_rotation() ** 2)
-    return np.mean(transl_err) ** 0.5, np.mean(rot_err) ** 0.5
\ No newline at end of file
+    return rmse(translation_distance(dTs)), rmse(rotation_distance(dTs))
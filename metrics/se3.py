@@ -0,0 +1,70 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+
+def as_poses_array(poses):
+    """
+    :param poses: sequence of 4x4 poses or an array of them with arbitrary leading batch dimensions
+    :return: float64 array of shape (..., 4, 4)
+    """
+    return np.asarray(poses, dtype=np.float64)
+
+
+def inverse(Ts):
+    """
+    Closed-form inverse of rigid body transformations
+    :param Ts: array of shape (..., 4, 4)
+    :return: array of shape (..., 4, 4)
+    """
+    R_inv = np.swapaxes(Ts[..., :3, :3], -1, -2)
+    T_inv = np.zeros_like(Ts)
+    T_inv[..., :3, :3] = R_inv
+    T_inv[..., :3, 3] = -np.einsum('...ij,...j->...i', R_inv, Ts[..., :3, 3])
+    T_inv[..., 3, 3] = 1
+    return T_inv
+
+
+def translation_distance(Ts):
+    """
+    :param Ts: array of shape (..., 4, 4)
+    :return: norms of translations, array of shape (...)
+    """
+    return np.linalg.norm(Ts[..., :3, 3], axis=-1)
+
+
+def rotation_distance(Ts):
+    """
+    Rotation angles, same as the norm of the SO(3) logarithm
+    :param Ts: array of shape (..., 4, 4)
+    :return: angles in radians, array of shape (...)
+    """
+    R = Ts[..., :3, :3]
+    trace = R[..., 0, 0] + R[..., 1, 1] + R[..., 2, 2]
+    axis = np.stack([
+        R[..., 2, 1] - R[..., 1, 2],
+        R[..., 0, 2] - R[..., 2, 0],
+        R[..., 1, 0] - R[..., 0, 1],
+    ], axis=-1)
+    # atan2 keeps precision for small angles where arccos of the trace does not
+    return np.arctan2(np.linalg.norm(axis, axis=-1), trace - 1)
+
+
+def rmse(errors):
+    """
+    :param errors: array of shape (..., N)
+    :return: root mean square over the last axis
+    """
+    return np.mean(errors ** 2, axis=-1) ** 0.5
@@ -12,7 +12,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import mrob
 import numpy as np
 
 
@@ -35,5 +34,68 @@ def generate_uniform_vector(r):
 
 
 def generate_random_pose_shift(rotation_shift, translation_shift):
+    import mrob
+
     shift_se3 = np.hstack([generate_uniform_vector(rotation_shift), generate_uniform_vector(translation_shift)])
-    return mrob.geometry.SE3(shift_se3).T()
\ No newline at end of file
+    return mrob.geometry.SE3(shift_se3).T()
+
+
+def generate_uniform_vectors(r, count, rng):
+    theta = rng.uniform(0, 2 * np.pi, count)
+    phi = rng.uniform(0, np.pi, count)
+    return r * np.stack([np.sin(phi) * np.cos(theta), np.sin(phi) * np.sin(theta), np.cos(phi)], axis=1)
+
+
+def se3_exp(xi):
+    """
+    Vectorized exponential map of SE(3), same convention as mrob.geometry.SE3
+    :param xi: Nx6 array of (rotation, translation) vectors
+    :return: Nx4x4 array of transformations
+    """
+    w, v = xi[:, :3], xi[:, 3:]
+    theta = np.linalg.norm(w, axis=1)
+    W = np.zeros((len(xi), 3, 3))
+    W[:, 0, 1], W[:, 0, 2], W[:, 1, 2] = -w[:, 2], w[:, 1], -w[:, 0]
+    W[:, 1, 0], W[:, 2, 0], W[:, 2, 1] = w[:, 2], -w[:, 1], w[:, 0]
+    W2 = W @ W
+
+    # Taylor expansions replace the closed forms near zero rotation
+    small = theta < 1e-8
+    safe_theta = np.where(small, 1, theta)
+    a = np.where(small, 1 - theta ** 2 / 6, np.sin(safe_theta) / safe_theta)
+    b = np.where(small, 0.5 - theta ** 2 / 24, (1 - np.cos(safe_theta)) / safe_theta ** 2)
+    c = np.where(small, 1 / 6 - theta ** 2 / 120, (safe_theta - np.sin(safe_theta)) / safe_theta ** 3)
+
+    identity = np.eye(3)
+    Ts = np.zeros((len(xi), 4, 4))
+    Ts[:, :3, :3] = identity + a[:, None, None] * W + b[:, None, None] * W2
+    V = identity + b[:, None, None] * W + c[:, None, None] * W2
+    Ts[:, :3, 3] = np.einsum('nij,nj->ni', V, v)
+    Ts[:, 3, 3] = 1
+    return Ts
+
+
+def generate_random_pose_shifts(perturbation, count, rng):
+    """
+    Batch counterpart of generate_random_pose_shift
+    :param perturbation: Perturbation, rotation shift is in degrees
+    :param count: number of shifts
+    :param rng: numpy.random.Generator
+    :return: count x 4 x 4 array of shifts
+    """
+    shift_se3 = np.hstack([
+        generate_uniform_vectors(perturbation.rotation_shift / 180 * np.pi, count, rng),
+        generate_uniform_vectors(perturbation.translation_shift, count, rng),
+    ])
+    return se3_exp(shift_se3)
+
+
+def perturb_trajectory(trajectory, perturbation, rng):
+    """
+    :param trajectory: sequence of 4x4 poses
+    :param perturbation: Perturbation, rotation shift is in degrees
+    :param rng: numpy.random.Generator
+    :return: Nx4x4 array of poses, every pose is shifted in its own frame
+    """
+    trajectory = np.asarray(trajectory, dtype=np.float64)
+    return trajectory @ generate_random_pose_shifts(perturbation, len(trajectory), rng)
@@ -13,30 +13,96 @@
 # limitations under the License.
 
 import abc
-import datetime
+import contextlib
+import time
+
 import mrob
 import numpy as np
 
+from plane_backends.GraphTemplate import GraphTemplate
+from plane_backends.SolveResult import SolveResult
+from plane_backends.SolverConfig import SolverConfig
+
 
 class BaseBackend(abc.ABC):
-    def __init__(self, iterations_count):
-        self.graph = mrob.FGraph()
-        self.iterations_count = iterations_count
-    
+    # Backends which register points of planes cannot solve observations built from moments only
+    requires_points = False
+    # Initial Levenberg-Marquardt damping used when the config does not set one
+    default_damping = 1e-5
+    # Traced optimization stops when rejected steps raise damping above this value
+    max_traced_damping = 1e10
+
+    def __init__(self, config):
+        """
+        :param config: SolverConfig or the maximal number of iterations
+        """
+        self.graph = None
+        self.config = config if isinstance(config, SolverConfig) else SolverConfig(config)
+        self.trace = None
+        self.__before_phase_hooks = []
+        self.__after_phase_hooks = []
+
+    @property
+    def iterations_count(self):
+        return self.config.iterations_count
+
+    def add_phase_hooks(self, before=None, after=None):
+        """
+        Registers callbacks around every solve phase, e.g. to attach profilers or tracing
+        :param before: called as before(backend, phase) when a phase starts
+        :param after: called as after(backend, phase, elapsed_seconds) when a phase ends
+        """
+        if before is not None:
+            self.__before_phase_hooks.append(before)
+        if after is not None:
+            self.__after_phase_hooks.append(after)
+
     def solve(self, observations, Ts_init=None):
+        """
+        Builds a new graph and optimizes it
+        :param observations: list of dicts from plane id to points of the plane, an ObservationSet or a GraphTemplate
+        :param Ts_init: initial poses, identities by default
+        :return: SolveResult
+        """
         if Ts_init is None:
-            Ts_init = [np.eye(4) for _ in observations]
-            
-        self._init_poses(Ts_init)
-        self.__add_observations(observations)
-        timestamp_before_optimization = datetime.datetime.now()
-        used_iterations_count = self._optimize()
-        timestamp_after_optimization = datetime.datetime.now()
-        return (
-            self.__get_trajectory(),
-            used_iterations_count,
-            (timestamp_after_optimization - timestamp_before_optimization).microseconds
-        )
+            Ts_init = [np.eye(4) for _ in range(len(observations))]
+
+        timings = {}
+        self.trace = None
+        with self.__phase('init_poses', timings):
+            self.graph = mrob.FGraph()
+            self._init_poses(Ts_init)
+        with self.__phase('register_observations', timings):
+            self.__add_observations(GraphTemplate.of(observations))
+        with self.__phase('optimize', timings):
+            used_iterations_count = self._optimize()
+        with self.__phase('extract_state', timings):
+            trajectory = self.__get_trajectory()
+
+        return SolveResult(trajectory, used_iterations_count, timings, self.trace)
+
+    def solve_many(self, observations, Ts_inits):
+        """
+        Solves the same observations from several initial trajectories, observations are compiled once
+        :param observations: list of dicts from plane id to points of the plane, an ObservationSet or a GraphTemplate
+        :param Ts_inits: list of initial trajectories
+        :return: list of SolveResult, one per initial trajectory
+        """
+        template = GraphTemplate.of(observations)
+        return [self.solve(template, Ts_init) for Ts_init in Ts_inits]
+
+    @contextlib.contextmanager
+    def __phase(self, phase, timings):
+        for hook in self.__before_phase_hooks:
+            hook(self, phase)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # A failed phase is still timed and reported, so profilers attached by hooks are stopped
+            timings[phase] = time.perf_counter() - start
+            for hook in self.__after_phase_hooks:
+                hook(self, phase, timings[phase])
 
     def _init_poses(self, Ts_init):
         # Add nodes for poses
@@ -47,28 +113,59 @@ class BaseBackend(abc.ABC):
     def __get_trajectory(self):
         return self.graph.get_estimated_state()
 
-    def __add_observations(self, observations):
-        label_id_to_graph_id = {}
-        for pose_id, observation in enumerate(observations):
-            for plane_id in observation:
-                if plane_id in label_id_to_graph_id:
-                    # This landmark already exists in the graph
-                    graph_plane_id = label_id_to_graph_id[plane_id]
-                else:
-                    # This landmarks doesn't exist in the graph
-                    graph_plane_id = self._add_node_to_graph()
-                    label_id_to_graph_id[plane_id] = graph_plane_id
+    def __add_observations(self, template):
+        graph_plane_ids = []
+        for pose_id, plane_index, plane in template.factors:
+            if self.requires_points and not plane.has_points:
+                raise ValueError(
+                    "{} needs points of planes, but observations contain moments only".format(type(self).__name__)
+                )
+            if plane_index == len(graph_plane_ids):
+                # This landmarks doesn't exist in the graph
+                graph_plane_ids.append(self._add_node_to_graph())
 
-                self._register_observation(observation, pose_id, plane_id, graph_plane_id)
+            self._register_observation(plane, pose_id, graph_plane_ids[plane_index])
 
     @abc.abstractmethod
     def _add_node_to_graph(self):
         pass
 
     @abc.abstractmethod
-    def _register_observation(self, observation, pose_id, plane_id, graph_plane_id):
+    def _register_observation(self, plane, pose_id, graph_plane_id):
         pass
 
-    @abc.abstractmethod
     def _optimize(self):
-        pass
+        damping = self.default_damping if self.config.damping is None else self.config.damping
+        if self.config.trace:
+            return self.__optimize_traced(damping)
+
+        return self.graph.solve(
+            mrob.LM_ELLIPS,
+            self.config.iterations_count,
+            lambdaParam=damping,
+            solutionTolerance=self.config.tolerance
+        )
+
+    def __optimize_traced(self, damping):
+        # Separate stepping mode: iterations are run one by one and damping is adapted here
+        # instead of inside the optimizer, see SolverConfig.trace
+        costs = [self.graph.chi2()]
+        step_times = []
+        while len(step_times) < self.config.iterations_count:
+            start = time.perf_counter()
+            self.graph.solve(mrob.LM_ELLIPS, 1, lambdaParam=damping, solutionTolerance=self.config.tolerance)
+            step_times.append(time.perf_counter() - start)
+            costs.append(self.graph.chi2())
+
+            # A rejected step leaves the state unchanged, no step can be accepted once damping is that large
+            if costs[-1] >= costs[-2]:
+                damping *= 10
+                if damping > self.max_traced_damping:
+                    break
+                continue
+            if costs[-2] - costs[-1] <= self.config.tolerance * costs[-2]:
+                break
+            damping /= 3
+
+        self.trace = {'cost': np.asarray(costs), 'step_time': np.asarray(step_times)}
+        return len(step_times)
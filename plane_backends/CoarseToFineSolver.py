@@ -0,0 +1,106 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from plane_backends.GraphTemplate import GraphTemplate
+from plane_backends.SolveResult import SolveResult
+from plane_backends.SolverConfig import SolverConfig
+from plane_backends.solver_factory import create_solver_by_name
+from plane_extractor.decimation import MaxPointsPerPlane, decimate_observations
+
+# Levels as (decimation strategies, iterations count), None keeps all points
+DEFAULT_LEVELS = [
+    ([MaxPointsPerPlane(64)], 100),
+    ([MaxPointsPerPlane(512)], 50),
+    (None, 50),
+]
+
+
+class CoarseToFineSolver:
+    """
+    Solves a sequence on progressively denser observations: the trajectory estimated
+    on every level initializes the next one, so most iterations from a poor initial
+    guess are spent on a few points per plane.
+    :attribute solver_name: name of the backend from solver_factory
+    :attribute levels: list of (decimation strategies or None, iterations count) from coarse to fine
+    :attribute seed: seed of random decimation strategies
+    :attribute config: SolverConfig whose damping, tolerance and trace are used on every level,
+    iterations counts come from levels
+    """
+
+    def __init__(self, solver_name, levels=None, seed=0, config=None):
+        self.solver_name = solver_name
+        self.levels = DEFAULT_LEVELS if levels is None else levels
+        self.seed = seed
+        self.config = SolverConfig() if config is None else config
+
+    def compile(self, observations):
+        """
+        :param observations: list of dicts from plane id to points or PlaneStatistics of the plane
+        :return: GraphTemplate of every level
+        """
+        rng = np.random.default_rng(self.seed)
+        templates = []
+        for strategies, _ in self.levels:
+            if strategies is None:
+                templates.append(GraphTemplate.of(observations))
+            else:
+                templates.append(GraphTemplate(decimate_observations(observations, strategies, rng)[0]))
+        return templates
+
+    def solve(self, observations, Ts_init=None):
+        """
+        :param observations: list of dicts from plane id to points of the plane or templates from compile
+        :param Ts_init: initial poses, identities by default
+        :return: SolveResult of the finest level with iterations and timings summed over all levels,
+        a trace holds the finest level and keeps coarser ones in 'previous_levels'
+        """
+        templates = observations if self.__is_compiled(observations) else self.compile(observations)
+        poses_count = len(templates[0])
+        if Ts_init is None:
+            Ts_init = [np.eye(4) for _ in range(poses_count)]
+
+        result = None
+        iterations_count = 0
+        timings = {}
+        traces = []
+        for template, (_, level_iterations_count) in zip(templates, self.levels):
+            config = SolverConfig(level_iterations_count, self.config.damping, self.config.tolerance, self.config.trace)
+            result = create_solver_by_name(self.solver_name, config=config).solve(template, Ts_init)
+            Ts_init = result.trajectory[:poses_count]
+            iterations_count += result.iterations_count
+            for phase, seconds in result.timings.items():
+                timings[phase] = timings.get(phase, 0) + seconds
+            if result.trace is not None:
+                traces.append(result.trace)
+
+        return SolveResult(result.trajectory, iterations_count, timings, self.__combine_traces(traces))
+
+    def solve_many(self, observations, Ts_inits):
+        templates = self.compile(observations)
+        return [self.solve(templates, Ts_init) for Ts_init in Ts_inits]
+
+    @staticmethod
+    def __combine_traces(traces):
+        if not traces:
+            return None
+        # Costs of coarse levels are computed on fewer points, so they are not comparable with the finest one
+        return dict(traces[-1], previous_levels=traces[:-1])
+
+    def __is_compiled(self, observations):
+        return (
+            len(observations) == len(self.levels)
+            and all(isinstance(template, GraphTemplate) for template in observations)
+        )
@@ -0,0 +1,83 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from plane_backends.ObservationSet import ObservationSet
+from plane_backends.PlaneStatistics import PlaneStatistics
+
+
+class GraphTemplate:
+    """
+    A class to represent observations of a sequence compiled into the exact order
+    in which backends add plane nodes and factors to a graph.
+    A template is independent of poses and of the backend, so it is built once per
+    sequence and solved from many initial trajectories by any backend, giving the
+    same results as solving the observations directly.
+    Only the conversion of observations to plane statistics and the fitting of plane
+    equations are shared: states of an mrob graph cannot be reset, so a backend still
+    builds a new graph from the template on every solve.
+    :attribute poses_count: number of observed poses
+    :attribute plane_ids: plane ids in order of their first observation
+    :attribute factors: list of (pose id, plane index, PlaneStatistics) in registration order
+    """
+
+    def __init__(self, observations):
+        if isinstance(observations, ObservationSet):
+            self.__init_from_observation_set(observations)
+            return
+
+        plane_indices = {}
+        self.factors = []
+        for pose_id, observation in enumerate(PlaneStatistics.precompute(observations)):
+            for plane_id, statistics in observation.items():
+                plane_index = plane_indices.setdefault(plane_id, len(plane_indices))
+                self.factors.append((pose_id, plane_index, statistics))
+
+        self.poses_count = len(observations)
+        self.plane_ids = list(plane_indices)
+
+    def __init_from_observation_set(self, observation_set):
+        # Plane indices follow the first observation of every plane, as for lists of observations
+        unique_plane_ids, first_segments, inverse = np.unique(
+            observation_set.plane_ids, return_index=True, return_inverse=True
+        )
+        order = np.argsort(first_segments)
+        plane_indices = np.empty(len(order), dtype=np.int64)
+        plane_indices[order] = np.arange(len(order))
+
+        # Moments and equations of all segments are computed at once unless the set has them precomputed
+        S = observation_set.moments()
+        equations = observation_set.plane_equations()
+        self.factors = []
+        for k, (pose_id, _, points) in enumerate(observation_set.segments()):
+            statistics = PlaneStatistics(points, S[k])
+            statistics.equation = equations[k]
+            self.factors.append((pose_id, int(plane_indices[inverse[k]]), statistics))
+
+        self.poses_count = len(observation_set)
+        self.plane_ids = [observation_set.plane_key(plane_id) for plane_id in unique_plane_ids[order]]
+
+    def __len__(self):
+        return self.poses_count
+
+    @staticmethod
+    def of(observations):
+        """
+        :param observations: list of dicts from plane id to points of the plane, an ObservationSet or a GraphTemplate
+        :return: GraphTemplate of observations
+        """
+        if isinstance(observations, GraphTemplate):
+            return observations
+        return GraphTemplate(observations)
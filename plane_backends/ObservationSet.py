@@ -0,0 +1,239 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from plane_backends.PlaneStatistics import PlaneStatistics
+from plane_extractor.plane_fitting import accumulate_moments, fit_planes_from_moments
+
+
+class ObservationSet:
+    """
+    A class to represent observations of a sequence in a few contiguous arrays.
+    Points of every plane observation (segment) are stored one after another in a single buffer,
+    segments are ordered by frame. Windows of frames are views of the same buffer and the whole set
+    can be placed in shared memory, so worker processes attach to it without serialization.
+    Indexing a single frame or iterating gives dicts from plane id to points, as lists of observations do.
+    :attribute points: Px3 buffer with points of all segments
+    :attribute offsets: K+1 array, points of segment k are points[offsets[k]:offsets[k + 1]]
+    :attribute plane_ids: K array of plane id of every segment
+    :attribute frame_ids: K non-decreasing array of frame of every segment
+    :attribute frames_count: number of frames, frames without planes are allowed
+    :attribute plane_keys: original plane ids if they are not integers (e.g. colors), None otherwise
+    :attribute S: Kx4x4 precomputed moments of every segment, None until precompute is called
+    :attribute equations: Kx4 precomputed plane equations of every segment, None until precompute is called
+    """
+
+    def __init__(self, points, offsets, plane_ids, frame_ids, frames_count, plane_keys=None, S=None, equations=None):
+        self.points = points
+        self.offsets = offsets
+        self.plane_ids = plane_ids
+        self.frame_ids = frame_ids
+        self.frames_count = frames_count
+        self.plane_keys = plane_keys
+        self.S = S
+        self.equations = equations
+        self.frame_offsets = np.searchsorted(frame_ids, np.arange(frames_count + 1))
+        self.__shared_memory = None
+
+    @staticmethod
+    def from_observations(observations, dtype=np.float64):
+        """
+        :param observations: list of dicts from plane id to points or PlaneStatistics of the plane
+        :param dtype: type of the point buffer, float32 halves memory of large sequences
+        :return: ObservationSet with a copy of all points
+        """
+        keys = [plane_id for observation in observations for plane_id in observation]
+        planes_points = [
+            np.asarray(plane.points if isinstance(plane, PlaneStatistics) else plane).reshape(-1, 3)
+            for observation in observations for plane in observation.values()
+        ]
+        counts = np.asarray([len(points) for points in planes_points], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        points = np.concatenate(planes_points).astype(dtype, copy=False) if planes_points else np.empty((0, 3), dtype)
+        frame_ids = np.repeat(
+            np.arange(len(observations), dtype=np.int64),
+            [len(observation) for observation in observations]
+        )
+
+        plane_keys = None
+        if all(isinstance(key, (int, np.integer)) for key in keys):
+            plane_ids = np.asarray(keys, dtype=np.int64)
+        else:
+            plane_indices = {}
+            plane_ids = np.asarray([plane_indices.setdefault(key, len(plane_indices)) for key in keys], dtype=np.int64)
+            plane_keys = list(plane_indices)
+
+        return ObservationSet(points, offsets, plane_ids, frame_ids, len(observations), plane_keys)
+
+    def __len__(self):
+        return self.frames_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.frames_count)
+            if step != 1:
+                raise ValueError("Only contiguous windows of frames are supported")
+            return self.window(start, max(start, stop))
+
+        if index < 0:
+            index += self.frames_count
+        if not 0 <= index < self.frames_count:
+            raise IndexError("Frame index out of range")
+        return {
+            self.plane_key(self.plane_ids[k]): self.points[self.offsets[k]:self.offsets[k + 1]]
+            for k in range(self.frame_offsets[index], self.frame_offsets[index + 1])
+        }
+
+    def __iter__(self):
+        return (self[i] for i in range(self.frames_count))
+
+    @property
+    def segments_count(self):
+        return len(self.plane_ids)
+
+    def plane_key(self, plane_id):
+        """
+        :param plane_id: integer plane id of a segment
+        :return: plane id as it was given in observations
+        """
+        return int(plane_id) if self.plane_keys is None else self.plane_keys[plane_id]
+
+    def window(self, start, stop):
+        """
+        :param start: first frame of a window
+        :param stop: frame after the last frame of a window
+        :return: ObservationSet of the frames, its points are a view of the points of this set
+        """
+        first, last = self.frame_offsets[start], self.frame_offsets[stop]
+        return ObservationSet(
+            self.points[self.offsets[first]:self.offsets[last]],
+            self.offsets[first:last + 1] - self.offsets[first],
+            self.plane_ids[first:last],
+            self.frame_ids[first:last] - start,
+            stop - start,
+            self.plane_keys,
+            None if self.S is None else self.S[first:last],
+            None if self.equations is None else self.equations[first:last]
+        )
+
+    def segments(self):
+        """
+        :return: generator of (frame id, plane id, points) of every segment in frame order
+        """
+        for k in range(self.segments_count):
+            yield int(self.frame_ids[k]), int(self.plane_ids[k]), self.points[self.offsets[k]:self.offsets[k + 1]]
+
+    def moments(self):
+        """
+        :return: Kx4x4 sums of outer products of homogeneous points of every segment
+        """
+        if self.S is not None:
+            return self.S
+        segment_ids = np.repeat(np.arange(self.segments_count), np.diff(self.offsets))
+        return accumulate_moments(self.points.astype(np.float64, copy=False).T, segment_ids, self.segments_count)
+
+    def plane_equations(self):
+        """
+        :return: Kx4 equations of planes fitted to every segment
+        """
+        if self.equations is not None:
+            return self.equations
+        if self.segments_count == 0:
+            return np.empty((0, 4))
+        return fit_planes_from_moments(self.moments())
+
+    def precompute(self):
+        """
+        Computes moments and plane equations of all segments once, windows and shared copies of the set keep them
+        :return: this set
+        """
+        self.S = self.moments()
+        self.equations = self.plane_equations()
+        return self
+
+    def share(self):
+        """
+        Copies the set into a new shared memory block, the caller must free it with ObservationSet.release
+        :return: shared memory block and a small picklable descriptor to pass to ObservationSet.attach
+        """
+        arrays = [self.points, self.offsets, self.plane_ids, self.frame_ids]
+        precomputed = self.S is not None and self.equations is not None
+        if precomputed:
+            arrays += [self.S, self.equations]
+        block = shared_memory.SharedMemory(create=True, size=max(1, sum(array.nbytes for array in arrays)))
+        position = 0
+        for array in arrays:
+            np.ndarray(array.shape, array.dtype, block.buf, position)[...] = array
+            position += array.nbytes
+
+        descriptor = {
+            'name': block.name,
+            'dtype': self.points.dtype.str,
+            'points_count': len(self.points),
+            'segments_count': self.segments_count,
+            'frames_count': self.frames_count,
+            'plane_keys': self.plane_keys,
+            'precomputed': precomputed,
+        }
+        return block, descriptor
+
+    @staticmethod
+    def attach(descriptor):
+        """
+        :param descriptor: descriptor returned by ObservationSet.share
+        :return: ObservationSet whose arrays are views of the shared memory block
+        """
+        # The creating process owns the block, attached processes must not unlink it on exit
+        if sys.version_info >= (3, 13):
+            block = shared_memory.SharedMemory(descriptor['name'], track=False)
+        else:
+            # Older versions always register attached blocks, which would be unlinked when this process exits
+            block = shared_memory.SharedMemory(descriptor['name'])
+            resource_tracker.unregister(block._name, 'shared_memory')
+
+        points_count, segments_count = descriptor['points_count'], descriptor['segments_count']
+        points = np.ndarray((points_count, 3), np.dtype(descriptor['dtype']), block.buf, 0)
+        position = points.nbytes
+        arrays = []
+        for length in (segments_count + 1, segments_count, segments_count):
+            arrays.append(np.ndarray(length, np.int64, block.buf, position))
+            position += arrays[-1].nbytes
+        S, equations = None, None
+        if descriptor['precomputed']:
+            S = np.ndarray((segments_count, 4, 4), np.float64, block.buf, position)
+            equations = np.ndarray((segments_count, 4), np.float64, block.buf, position + S.nbytes)
+
+        observation_set = ObservationSet(
+            points, *arrays, descriptor['frames_count'], descriptor['plane_keys'], S, equations
+        )
+        # Views are valid only while the block is open
+        observation_set.__shared_memory = block
+        return observation_set
+
+    @staticmethod
+    def release(block):
+        """
+        Closes and unlinks a shared memory block returned by ObservationSet.share
+        :param block: shared memory block
+        """
+        block.close()
+        if sys.version_info < (3, 13):
+            # Attached processes started by multiprocessing share the resource tracker of the creating one,
+            # so their unregistering dropped the block from it and unlink would fail to unregister it again
+            resource_tracker.register(block._name, 'shared_memory')
+        block.unlink()
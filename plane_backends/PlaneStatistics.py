@@ -0,0 +1,112 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from functools import cached_property
+
+import numpy as np
+
+from plane_extractor.plane_fitting import fit_planes_from_covariances, fit_planes_from_moments
+
+
+class PlaneStatistics:
+    """
+    A class to represent sufficient statistics of a single plane observation.
+    Statistics are computed on first access and kept, so observations converted once
+    with precompute can be shared by every backend and every solve.
+    :attribute points: points of a plane, unavailable if the plane was built from moments only
+    :attribute S: sum of outer products of homogeneous points (4x4 moment matrix)
+    :attribute points_count: number of points of a plane
+    :attribute centroid: mean of points of a plane
+    :attribute covariance: scatter matrix of points around the centroid
+    :attribute equation: plane equation [nx, ny, nz, d] with non-negative d
+    """
+
+    def __init__(self, points=None, S=None):
+        if points is None and S is None:
+            raise ValueError("Either points or moment matrix S must be provided")
+
+        self.__points = None if points is None else np.ascontiguousarray(points, dtype=np.float64)
+        if S is not None:
+            self.S = np.asarray(S, dtype=np.float64)
+
+    @property
+    def points(self):
+        if self.__points is None:
+            raise ValueError("Plane was built from moments only and has no points")
+        return self.__points
+
+    @property
+    def has_points(self):
+        return self.__points is not None
+
+    @cached_property
+    def S(self):
+        points = self.__points
+        S = np.empty((4, 4))
+        S[:3, :3] = points.T @ points
+        S[:3, 3] = S[3, :3] = points.sum(axis=0)
+        S[3, 3] = len(points)
+        return S
+
+    @property
+    def points_count(self):
+        if self.__points is not None:
+            return len(self.__points)
+        return int(round(self.S[3, 3]))
+
+    @cached_property
+    def centroid(self):
+        if self.__points is not None:
+            return self.__points.mean(axis=0)
+        return self.S[:3, 3] / self.S[3, 3]
+
+    @cached_property
+    def covariance(self):
+        if self.__points is not None:
+            centered = self.__points - self.centroid
+            return centered.T @ centered
+        return self.S[:3, :3] - self.S[3, 3] * np.outer(self.centroid, self.centroid)
+
+    @cached_property
+    def equation(self):
+        return fit_planes_from_covariances(self.centroid[np.newaxis], self.covariance[np.newaxis])[0]
+
+    @staticmethod
+    def of(plane):
+        """
+        :param plane: points of a plane or its PlaneStatistics
+        :return: PlaneStatistics of a plane
+        """
+        if isinstance(plane, PlaneStatistics):
+            return plane
+        return PlaneStatistics(plane)
+
+    @staticmethod
+    def precompute(observations):
+        """
+        Converts observations once, so repeated solves do not recompute plane statistics.
+        Equations of all planes are fitted with a single batched call.
+        :param observations: list of dicts from plane id to points of the plane
+        :return: list of dicts from plane id to PlaneStatistics with moments and equations computed
+        """
+        precomputed = [
+            {plane_id: PlaneStatistics.of(plane) for plane_id, plane in observation.items()}
+            for observation in observations
+        ]
+        planes = [statistics for observation in precomputed for statistics in observation.values()]
+        if planes:
+            equations = fit_planes_from_moments(np.stack([statistics.S for statistics in planes]))
+            for statistics, equation in zip(planes, equations):
+                statistics.equation = equation
+        return precomputed
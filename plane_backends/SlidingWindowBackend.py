@@ -0,0 +1,86 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+
+import numpy as np
+
+from plane_backends.PlaneStatistics import PlaneStatistics
+from plane_backends.SolverConfig import SolverConfig
+from plane_backends.solver_factory import create_solver_by_name
+
+
+class SlidingWindowBackend:
+    """
+    Online mode of a backend: frames are added one at a time and only the last
+    window_size frames are optimized, starting from their previous estimates.
+    The oldest pose of the window is fixed, poses which leave the window are frozen.
+    mrob graphs can neither drop nodes nor change their mode, so the graph of the
+    window is rebuilt on every frame, which keeps its size and the latency bounded.
+    :attribute solver_name: name of the backend from solver_factory
+    :attribute window_size: maximal number of optimized poses
+    :attribute config: SolverConfig of every window solve
+    :attribute trajectory: frozen poses followed by current estimates of the window
+    """
+
+    def __init__(self, solver_name, window_size, config):
+        """
+        :param config: SolverConfig or the iterations budget of every window solve
+        """
+        if window_size < 2:
+            raise ValueError("Window must contain at least two poses")
+
+        self.solver_name = solver_name
+        self.window_size = window_size
+        self.config = config if isinstance(config, SolverConfig) else SolverConfig(config)
+        self.__frozen_poses = []
+        self.__window_poses = collections.deque()
+        self.__window_observations = collections.deque()
+
+    @property
+    def iterations_count(self):
+        return self.config.iterations_count
+
+    @property
+    def trajectory(self):
+        return self.__frozen_poses + list(self.__window_poses)
+
+    def add_frame(self, observation, T_init=None):
+        """
+        Adds a frame and re-optimizes the window
+        :param observation: dict from plane id to points or PlaneStatistics of the plane
+        :param T_init: initial pose of the frame, the last estimated pose by default
+        :return: SolveResult of the window, None for the very first frame
+        """
+        if T_init is None:
+            T_init = self.__window_poses[-1] if self.__window_poses else np.eye(4)
+
+        if len(self.__window_poses) == self.window_size:
+            self.__frozen_poses.append(self.__window_poses.popleft())
+            self.__window_observations.popleft()
+        self.__window_poses.append(np.asarray(T_init, dtype=np.float64))
+        # Statistics are computed once per frame and reused by every window it takes part in
+        self.__window_observations.append(
+            {plane_id: PlaneStatistics.of(plane) for plane_id, plane in observation.items()}
+        )
+
+        if len(self.__window_poses) == 1:
+            return None
+
+        solver = create_solver_by_name(self.solver_name, config=self.config)
+        result = solver.solve(list(self.__window_observations), list(self.__window_poses))
+        window_poses_count = len(self.__window_poses)
+        self.__window_poses = collections.deque(result.trajectory[:window_poses_count])
+
+        return result
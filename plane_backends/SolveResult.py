@@ -0,0 +1,71 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+
+class SolveResult:
+    """
+    A class to represent a result of a backend solve
+    :attribute trajectory: estimated states of the graph, poses go first
+    :attribute iterations_count: number of iterations reported by the optimizer
+    :attribute timings: dict from solve phase name (init_poses, register_observations, optimize,
+    extract_state) to its duration in seconds
+    :attribute trace: dict with 'cost' before the first and after every iteration and 'step_time'
+    of every iteration in seconds, None if the solve was not traced. Traced iterations come from
+    the stepping mode described in SolverConfig.trace, not from the optimizer of an untraced solve.
+    Multi-level solves trace their finest level and keep traces of coarser ones in 'previous_levels'
+    """
+
+    def __init__(self, trajectory, iterations_count, timings, trace=None):
+        self.trajectory = trajectory
+        self.iterations_count = iterations_count
+        self.timings = timings
+        self.trace = trace
+
+    @property
+    def optimization_time(self):
+        """
+        :return: duration of the optimization phase in microseconds
+        """
+        return int(round(self.timings['optimize'] * 1e6))
+
+    @property
+    def total_time(self):
+        """
+        :return: duration of all phases in seconds
+        """
+        return sum(self.timings.values())
+
+    def time_to_cost(self, cost):
+        """
+        :param cost: target cost of the optimization, for multi-level solves the cost of the finest level
+        :return: seconds of traced iterations until the cost first reached the target, None if it never did.
+        Iterations of coarser levels are counted in full, as the finest level starts after them
+        """
+        if self.trace is None:
+            raise ValueError("Solve was not traced")
+
+        reached = np.flatnonzero(self.trace['cost'] <= cost)
+        if len(reached) == 0:
+            return None
+        previous_levels_time = sum(np.sum(level['step_time']) for level in self.trace.get('previous_levels', []))
+        return float(previous_levels_time + np.sum(self.trace['step_time'][:reached[0]]))
+
+    def __iter__(self):
+        # Keeps unpacking as (trajectory, iterations, optimization time in microseconds)
+        return iter((self.trajectory, self.iterations_count, self.optimization_time))
+
+    def __getitem__(self, index):
+        return tuple(self)[index]
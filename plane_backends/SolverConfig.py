@@ -0,0 +1,40 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+class SolverConfig:
+    """
+    A class to represent parameters of the Levenberg-Marquardt optimization shared by all backends
+    :attribute iterations_count: maximal number of iterations
+    :attribute damping: initial damping (lambda), None for the default of a backend
+    :attribute tolerance: optimization stops when the relative decrease of the cost is below it
+    :attribute trace: record cost and time of every iteration. This is a separate stepping mode rather than
+    the optimizer of an untraced solve: iterations are run one by one, damping is multiplied by 10 after
+    a rejected step and divided by 3 after an accepted one, and stepping stops when the relative decrease
+    of the cost is below tolerance or damping exceeds BaseBackend.max_traced_damping. Trajectories and
+    iteration counts may therefore differ from an untraced solve with the same config.
+    """
+
+    DEFAULT_TOLERANCE = 1e-6
+
+    def __init__(self, iterations_count=300, damping=None, tolerance=DEFAULT_TOLERANCE, trace=False):
+        if iterations_count < 1:
+            raise ValueError("iterations_count must be positive")
+        if damping is not None and damping <= 0:
+            raise ValueError("damping must be positive")
+
+        self.iterations_count = iterations_count
+        self.damping = damping
+        self.tolerance = tolerance
+        self.trace = trace
@@ -12,22 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import mrob
-
 from plane_backends.BaseBackend import BaseBackend
 
 
 class BaregBackend(BaseBackend):
+    requires_points = True
+
     def _add_node_to_graph(self):
         return self.graph.add_bareg_plane()
 
-    def _register_observation(self, observation, pose_id, plane_id, graph_plane_id):
+    def _register_observation(self, plane, pose_id, graph_plane_id):
         self.graph.eigen_factor_plane_add_points_array(
             planeEigenId=graph_plane_id,
             nodePoseId=pose_id,
-            pointsArray=observation[plane_id],
+            pointsArray=plane.points,
             W=1.0
         )
-
-    def _optimize(self):
-        return self.graph.solve(mrob.LM_ELLIPS, self.iterations_count)
\ No newline at end of file
@@ -12,14 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import mrob
-
 from plane_backends.EFBackend import EFBackend
 
 
 class EFAlternatingBackend(EFBackend):
     def _add_node_to_graph(self):
         return self.graph.add_eigen_factor_plane_alternating()
-
-    def _optimize(self):
-        return self.graph.solve(mrob.LM_ELLIPS, self.iterations_count)
@@ -12,15 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import mrob
-
 from plane_backends.EFBackend import EFBackend
 
 
 class EFDenseBackend(EFBackend):
+    default_damping = 0.1
+
     def _add_node_to_graph(self):
         return self.graph.add_eigen_factor_plane_dense()
-    
-    def _optimize(self):
-        print('Here')
-        return self.graph.solve(mrob.LM_ELLIPS, 1000, lambdaParam=0.1)
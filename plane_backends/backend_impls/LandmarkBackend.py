@@ -13,7 +13,6 @@
 # limitations under the License.
 
 import numpy as np
-import mrob
 
 from plane_backends.BaseBackend import BaseBackend
 
@@ -22,25 +21,8 @@ class LandmarkBackend(BaseBackend):
     def _add_node_to_graph(self):
         return self.graph.add_node_plane_4d(np.array([1, 0, 0, 0]))
 
-    def _register_observation(self, observation, pose_id, plane_id, graph_plane_id):
+    def _register_observation(self, plane, pose_id, graph_plane_id):
         w_z = np.identity(4)
-        plane_equation = self.__get_plane_equation(observation[plane_id])
         self.graph.add_factor_1pose_1plane_4d(
-            plane_equation, pose_id, graph_plane_id, w_z
+            plane.equation, pose_id, graph_plane_id, w_z
         )
-
-    @staticmethod
-    def __get_plane_equation(points):
-        c = np.mean(points, axis=0)
-        A = np.array(points) - c
-        eigvals, eigvects = np.linalg.eig(A.T @ A)
-        min_index = np.argmin(eigvals)
-        n = eigvects[:, min_index]
-
-        d = -np.dot(n, c)
-        normal = int(np.sign(d)) * n
-        d *= np.sign(d)
-        return np.asarray([normal[0], normal[1], normal[2], d])
-
-    def _optimize(self):
-        return self.graph.solve(mrob.LM_ELLIPS, self.iterations_count)
@@ -12,7 +12,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import mrob
 import numpy as np
 
 from plane_backends.BaseBackend import BaseBackend
@@ -22,11 +21,7 @@ class PiFBackend(BaseBackend):
     def _add_node_to_graph(self):
         return self.graph.add_node_plane_4d(np.array([1, 1, 1, 1]))
 
-    def _register_observation(self, observation, pose_id, plane_id, graph_plane_id):
-        S = mrob.registration.estimate_matrix_S(observation[plane_id])
+    def _register_observation(self, plane, pose_id, graph_plane_id):
         self.graph.add_pi_factor_plane_4d(
-            S, pose_id, graph_plane_id
+            plane.S, pose_id, graph_plane_id
         )
-
-    def _optimize(self):
-        return self.graph.solve(mrob.LM_ELLIPS, self.iterations_count)
\ No newline at end of file
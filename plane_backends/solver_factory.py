@@ -12,20 +12,84 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from plane_backends.backend_impls.BaregBackend import BaregBackend
-from plane_backends.backend_impls.EFDenseBackend import EFDenseBackend
-from plane_backends.backend_impls.EFAlternatingBackend import EFAlternatingBackend
-from plane_backends.backend_impls.LandmarkBackend import LandmarkBackend
-from plane_backends.backend_impls.PiFBackend import PiFBackend
+import importlib
+import importlib.metadata
 
+from plane_backends.SolverConfig import SolverConfig
+
+# Entry point group in which installed packages can publish their backends as 'module:Class'
+ENTRY_POINT_GROUP = 'ef_plane_slam.backends'
+
+# Backends by name, either classes or 'module:Class' paths imported on first use
 solvers = {
-    'ef-dense': EFDenseBackend,
-    'ef-alternating': EFAlternatingBackend,
-    'bareg': BaregBackend,
-    'pi-factor': PiFBackend,
-    'landmark': LandmarkBackend,
+    'ef-dense': 'plane_backends.backend_impls.EFDenseBackend:EFDenseBackend',
+    'ef-alternating': 'plane_backends.backend_impls.EFAlternatingBackend:EFAlternatingBackend',
+    'bareg': 'plane_backends.backend_impls.BaregBackend:BaregBackend',
+    'pi-factor': 'plane_backends.backend_impls.PiFBackend:PiFBackend',
+    'landmark': 'plane_backends.backend_impls.LandmarkBackend:LandmarkBackend',
 }
+_entry_points_loaded = False
+
+
+def register_solver(solver_name, backend):
+    """
+    Registers a backend or replaces the one registered under the same name
+    :param solver_name: name of the backend used in create_solver_by_name
+    :param backend: BaseBackend subclass or its 'module:Class' path to import on first use
+    """
+    solvers[solver_name] = backend
+
+
+def available_solvers():
+    """
+    :return: sorted names of all known backends, including those published via entry points
+    """
+    _load_entry_points()
+    return sorted(solvers)
+
+
+def get_solver_class(solver_name):
+    """
+    :param solver_name: name of a backend
+    :return: backend class, its module is imported on the first call
+    """
+    if solver_name not in solvers:
+        _load_entry_points()
+    if solver_name not in solvers:
+        raise ValueError("Unknown solver: {0}, available solvers: {1}".format(solver_name, ', '.join(sorted(solvers))))
+
+    backend = solvers[solver_name]
+    if isinstance(backend, str):
+        module_name, _, class_name = backend.partition(':')
+        backend = getattr(importlib.import_module(module_name), class_name)
+        solvers[solver_name] = backend
+    return backend
+
+
+def create_solver_by_name(solver_name, iterations_count=None, config=None):
+    """
+    :param solver_name: name of a backend
+    :param iterations_count: maximal number of iterations, shortcut for SolverConfig(iterations_count)
+    :param config: SolverConfig of the backend, takes precedence over iterations_count
+    :return: backend instance
+    """
+    if config is None:
+        config = SolverConfig() if iterations_count is None else SolverConfig(iterations_count)
+    return get_solver_class(solver_name)(config)
+
 
+def _load_entry_points():
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
 
-def create_solver_by_name(solver_name, iterations_count):
-    return solvers[solver_name](iterations_count)
+    entry_points = importlib.metadata.entry_points()
+    # Python 3.9 returns a dict of groups, newer versions support selection
+    if hasattr(entry_points, 'select'):
+        entry_points = entry_points.select(group=ENTRY_POINT_GROUP)
+    else:
+        entry_points = entry_points.get(ENTRY_POINT_GROUP, [])
+    for entry_point in entry_points:
+        # Explicitly registered backends take precedence over installed ones
+        solvers.setdefault(entry_point.name, entry_point.value)
@@ -0,0 +1,125 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from plane_backends.PlaneStatistics import PlaneStatistics
+
+
+class RandomSubsampling:
+    """
+    Keeps a random fraction of points of every plane
+    :attribute ratio: fraction of points to keep, in (0, 1]
+    """
+
+    def __init__(self, ratio):
+        if not 0 < ratio <= 1:
+            raise ValueError("Ratio must be in (0, 1]")
+        self.ratio = ratio
+
+    def select(self, points, rng):
+        kept_count = max(1, int(round(len(points) * self.ratio)))
+        return np.sort(rng.choice(len(points), kept_count, replace=False))
+
+
+class InPlaneVoxelGrid:
+    """
+    Keeps a single point per cell of a square grid laid in the plane of the points
+    :attribute voxel_size: size of a grid cell
+    """
+
+    def __init__(self, voxel_size):
+        if voxel_size <= 0:
+            raise ValueError("Voxel size must be positive")
+        self.voxel_size = voxel_size
+
+    def select(self, points, rng):
+        centered = points - points.mean(axis=0)
+        # Two principal directions with the largest spread span the plane
+        _, eigvects = np.linalg.eigh(centered.T @ centered)
+        cells = np.floor(centered @ eigvects[:, 1:] / self.voxel_size).astype(np.int64)
+        _, first_indices = np.unique(cells, axis=0, return_index=True)
+        return np.sort(first_indices)
+
+
+class MaxPointsPerPlane:
+    """
+    Keeps at most max_points_count randomly chosen points of every plane
+    :attribute max_points_count: maximal number of points per plane per frame
+    """
+
+    def __init__(self, max_points_count):
+        if max_points_count < 1:
+            raise ValueError("At least one point per plane must be kept")
+        self.max_points_count = max_points_count
+
+    def select(self, points, rng):
+        if len(points) <= self.max_points_count:
+            return np.arange(len(points))
+        return np.sort(rng.choice(len(points), self.max_points_count, replace=False))
+
+
+STRATEGIES = {
+    'random': RandomSubsampling,
+    'voxel_grid': InPlaneVoxelGrid,
+    'max_points': MaxPointsPerPlane,
+}
+
+
+def create_strategy(strategy_spec):
+    """
+    :param strategy_spec: dict with strategy name under 'type' and its parameters, e.g.
+    {'type': 'max_points', 'max_points_count': 500}
+    :return: decimation strategy
+    """
+    parameters = dict(strategy_spec)
+    return STRATEGIES[parameters.pop('type')](**parameters)
+
+
+def decimate_observations(observations, strategies, rng=None):
+    """
+    Reduces points of every plane before it is registered in a backend
+    :param observations: list of dicts from plane id to points or PlaneStatistics with points of the plane
+    :param strategies: decimation strategy or a list of them applied one after another
+    :param rng: numpy.random.Generator used by random strategies
+    :return: decimated observations and list of dicts from plane id to (kept points count, points count)
+    """
+    if not isinstance(strategies, (list, tuple)):
+        strategies = [strategies]
+    if rng is None:
+        rng = np.random.default_rng()
+
+    decimated_observations = []
+    kept_counts = []
+    for observation in observations:
+        decimated_observation = {}
+        observation_kept_counts = {}
+        for plane_id, plane in observation.items():
+            if isinstance(plane, PlaneStatistics):
+                if not plane.has_points:
+                    raise ValueError("Plane {} was built from moments only and cannot be decimated".format(plane_id))
+                points = plane.points
+            else:
+                points = np.asarray(plane)
+            decimated_points = points
+            for strategy in strategies:
+                decimated_points = decimated_points[strategy.select(decimated_points, rng)]
+
+            decimated_observation[plane_id] = decimated_points
+            observation_kept_counts[plane_id] = (len(decimated_points), len(points))
+
+        decimated_observations.append(decimated_observation)
+        kept_counts.append(observation_kept_counts)
+
+    return decimated_observations, kept_counts
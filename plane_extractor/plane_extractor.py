@@ -14,21 +14,71 @@
 
 import numpy as np
 
+# Label value of unlabeled (black) points
+UNLABELED = 0
 
-def extract_planes_from_pcd_colors(point_cloud):
+
+def colors_to_labels(colors):
+    """
+    Packs RGB colors into integer labels (0xRRGGBB),
+    colors with any zero channel are not treated as plane labels and are mapped to UNLABELED
+    :param colors: Nx3 array of colors, either floats in [0, 1] or uint8
+    :return: N array of int64 labels
+    """
+    colors = np.asarray(colors)
+    if colors.dtype != np.uint8:
+        colors = np.rint(colors * 255)
+    channels = colors.astype(np.int64)
+    labels = (channels[:, 0] << 16) | (channels[:, 1] << 8) | channels[:, 2]
+    labels[(channels == 0).any(axis=1)] = UNLABELED
+    return labels
+
+
+def group_points_by_labels(points, labels, min_points_count=1000, unlabeled=UNLABELED):
+    """
+    Splits points into groups of equal labels with a single stable sort
+    :param points: Nx3 array of points
+    :param labels: N array of integer labels
+    :param min_points_count: groups with this many points or fewer are dropped
+    :param unlabeled: label of points which do not belong to any group, None if all labels are groups
+    :return: dict from label to the index of its first point and the array of its points
+    """
+    order = np.argsort(labels, kind='stable')
+    sorted_labels = labels[order]
+    starts = np.flatnonzero(np.diff(sorted_labels, prepend=sorted_labels[:1] - 1))
+    ends = np.append(starts[1:], len(sorted_labels))
+
+    label_to_points = {}
+    for start, end in zip(starts, ends):
+        label = sorted_labels[start]
+        if label == unlabeled or end - start <= min_points_count:
+            continue
+        indices = order[start:end]
+        label_to_points[int(label)] = (indices[0], points[indices])
+
+    return label_to_points
+
+
+def extract_planes_from_labels(points, labels, min_points_count=1000):
+    """
+    :param points: Nx3 array of points
+    :param labels: N array of integer labels aligned with points
+    :param min_points_count: planes with this many points or fewer are dropped
+    :return: dict from label to the points of its plane
+    """
+    return {
+        label: plane_points
+        for label, (_, plane_points) in group_points_by_labels(points, labels, min_points_count).items()
+    }
+
+
+def extract_planes_from_pcd_colors(point_cloud, min_points_count=1000):
     points = np.asarray(point_cloud.points)
     colors = np.asarray(point_cloud.colors)
 
-    colors_unique = np.unique(colors, axis=0)
-    unique_colors_without_black = list(
-        filter(lambda x: (x != [0, 0, 0]).all(axis=0), colors_unique)
-    )
-
     color_to_points = {}
-
-    for color in unique_colors_without_black:
-        indices = np.where((colors == color).all(axis=1))[0]
-        if len(indices) > 1000:
-            color_to_points[tuple(color)] = points[indices]
+    labels = colors_to_labels(colors)
+    for first_index, plane_points in group_points_by_labels(points, labels, min_points_count).values():
+        color_to_points[tuple(colors[first_index])] = plane_points
 
     return color_to_points
@@ -0,0 +1,95 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+
+def fit_planes(points, segment_ids, segments_count=None):
+    """
+    Fits a plane to every segment of points at once
+    :param points: Nx3 array of points
+    :param segment_ids: N array of segment indices in [0, segments_count)
+    :param segments_count: number of segments, max segment index + 1 by default
+    :return: segments_count x 4 array of plane equations [nx, ny, nz, d] with non-negative d
+    """
+    points = np.asarray(points, dtype=np.float64)
+    segment_ids = np.asarray(segment_ids)
+    if segments_count is None:
+        segments_count = int(segment_ids.max()) + 1
+
+    counts = np.bincount(segment_ids, minlength=segments_count)
+    centroids = np.stack(
+        [np.bincount(segment_ids, points[:, axis], segments_count) for axis in range(3)],
+        axis=1
+    ) / counts[:, np.newaxis]
+
+    # Centering before accumulating keeps covariances of far away planes precise
+    centered = points - centroids[segment_ids]
+    covariances = np.empty((segments_count, 3, 3))
+    for i in range(3):
+        for j in range(i, 3):
+            covariances[:, i, j] = covariances[:, j, i] = np.bincount(
+                segment_ids, centered[:, i] * centered[:, j], segments_count
+            )
+
+    return fit_planes_from_covariances(centroids, covariances)
+
+
+def accumulate_moments(coordinates, segment_ids, segments_count):
+    """
+    Sums outer products of homogeneous points of every segment in a single pass
+    :param coordinates: x, y and z arrays of N points, e.g. columns of an Nx3 array
+    :param segment_ids: N array of segment indices in [0, segments_count)
+    :param segments_count: number of segments
+    :return: segments_count x 4 x 4 array of moment matrices S
+    """
+    S = np.empty((segments_count, 4, 4))
+    for i in range(3):
+        for j in range(i, 3):
+            S[:, i, j] = S[:, j, i] = np.bincount(segment_ids, coordinates[i] * coordinates[j], segments_count)
+        S[:, i, 3] = S[:, 3, i] = np.bincount(segment_ids, coordinates[i], segments_count)
+    S[:, 3, 3] = np.bincount(segment_ids, minlength=segments_count)
+    return S
+
+
+def fit_planes_from_moments(S):
+    """
+    :param S: Kx4x4 array of sums of outer products of homogeneous points of every plane
+    :return: Kx4 array of plane equations [nx, ny, nz, d] with non-negative d
+    """
+    S = np.asarray(S, dtype=np.float64)
+    counts = S[:, 3, 3]
+    centroids = S[:, :3, 3] / counts[:, np.newaxis]
+    covariances = S[:, :3, :3] - counts[:, np.newaxis, np.newaxis] * (
+        centroids[:, :, np.newaxis] * centroids[:, np.newaxis, :]
+    )
+    return fit_planes_from_covariances(centroids, covariances)
+
+
+def fit_planes_from_covariances(centroids, covariances):
+    """
+    :param centroids: Kx3 array of plane centroids
+    :param covariances: Kx3x3 array of scatter matrices of points around the centroids
+    :return: Kx4 array of plane equations [nx, ny, nz, d] with non-negative d
+    """
+    # Eigenvalues of symmetric matrices are sorted ascending, so the normal is the first eigenvector
+    _, eigvects = np.linalg.eigh(covariances)
+    normals = eigvects[:, :, 0]
+
+    d = -np.einsum('ij,ij->i', normals, centroids)
+    signs = np.sign(d)
+    equations = np.empty((len(normals), 4))
+    equations[:, :3] = normals * signs[:, np.newaxis]
+    equations[:, 3] = d * signs
+    return equations
@@ -16,6 +16,7 @@ from typing import List
 
 import numpy as np
 
+from plane_backends.PlaneStatistics import PlaneStatistics
 from scripts.enough_planes.Pcd import Pcd
 from scripts.enough_planes.Plane import Plane
 
@@ -25,14 +26,67 @@ class EnoughPlanesDetector:
     def has_enough_planes(pcd: Pcd) -> bool:
         return abs(EnoughPlanesDetector.__check_planes(pcd.planes)) > 0.1
 
+    @staticmethod
+    def score_observations(observations: List[dict]) -> np.ndarray:
+        """
+        :param observations: list of dicts from plane id to points or PlaneStatistics of the plane
+        :return: score of every frame, see score_normals
+        """
+        planes = PlaneStatistics.precompute(observations)
+        normals = [statistics.equation[:3] for observation in planes for statistics in observation.values()]
+        frame_ids = np.repeat(np.arange(len(planes)), [len(observation) for observation in planes])
+        return EnoughPlanesDetector.score_normals(np.reshape(normals, (-1, 3)), frame_ids, len(planes))
+
+    @staticmethod
+    def score_normals(normals: np.ndarray, frame_ids: np.ndarray, frames_count: int) -> np.ndarray:
+        """
+        Scores all frames at once by conditioning of the covariance of their plane normals
+        :param normals: Nx3 array of plane normals of all frames
+        :param frame_ids: N array of frame index of every normal
+        :param frames_count: number of frames
+        :return: ratio of the smallest to the largest eigenvalue for every frame, 0 for frames
+        whose planes cannot constrain all 6 DoF of a pose
+        """
+        eigvals = np.linalg.eigvalsh(EnoughPlanesDetector.__normal_covariances(normals, frame_ids, frames_count))
+        scores = np.zeros(frames_count)
+        np.divide(eigvals[:, 0], eigvals[:, -1], out=scores, where=eigvals[:, -1] > 0)
+        return np.clip(scores, 0, 1)
+
+    @staticmethod
+    def score_windows(frame_scores: np.ndarray, window_size: int) -> np.ndarray:
+        """
+        :param frame_scores: score of every frame of a sequence
+        :param window_size: number of frames in a window
+        :return: score of every window by its start, the worst score of its frames
+        """
+        if len(frame_scores) < window_size:
+            return np.empty(0)
+        return np.lib.stride_tricks.sliding_window_view(frame_scores, window_size).min(axis=1)
+
+    @staticmethod
+    def valid_window_starts(observations: List[dict], window_size: int, min_score: float) -> np.ndarray:
+        """
+        :param observations: list of dicts from plane id to points or PlaneStatistics of the plane
+        :param window_size: number of frames in a window
+        :param min_score: minimal score of every frame of a window
+        :return: starts of windows whose frames are all well constrained
+        """
+        frame_scores = EnoughPlanesDetector.score_observations(observations)
+        return np.flatnonzero(EnoughPlanesDetector.score_windows(frame_scores, window_size) >= min_score)
+
     @staticmethod
     def __check_planes(planes: List[Plane]):
-        matrix = []
-        for plane in planes:
-            matrix.append(plane.equation[:-1])
-        matrix = np.asarray(matrix)
-        covarience = matrix.T @ matrix
-        eigvals, eigvects = np.linalg.eig(covarience)
-        det = np.linalg.det(eigvects * eigvals)
-        print("Det was {}".format(det))
-        return det
+        normals = np.asarray([plane.equation[:-1] for plane in planes]).reshape(-1, 3)
+        covariance = EnoughPlanesDetector.__normal_covariances(normals, np.zeros(len(normals), dtype=np.int64), 1)
+        # Determinant of a symmetric matrix as a product of its eigenvalues
+        return np.prod(np.linalg.eigvalsh(covariance)[0])
+
+    @staticmethod
+    def __normal_covariances(normals: np.ndarray, frame_ids: np.ndarray, frames_count: int) -> np.ndarray:
+        covariances = np.empty((frames_count, 3, 3))
+        for i in range(3):
+            for j in range(i, 3):
+                covariances[:, i, j] = covariances[:, j, i] = np.bincount(
+                    frame_ids, normals[:, i] * normals[:, j], frames_count
+                )
+        return covariances
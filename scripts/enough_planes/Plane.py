@@ -14,6 +14,8 @@
 
 import numpy as np
 
+from plane_extractor.plane_fitting import fit_planes
+
 
 class Plane:
     """
@@ -36,13 +38,4 @@ class Plane:
         :param points: all points of a plane
         :return: equation of a plane
         """
-        c = np.mean(points, axis=0)
-        A = np.array(points) - c
-        eigvals, eigvects = np.linalg.eig(A.T @ A)
-        min_index = np.argmin(eigvals)
-        n = eigvects[:, min_index]
-
-        d = -np.dot(n, c)
-        normal = int(np.sign(d)) * n
-        d *= np.sign(d)
-        return np.asarray([normal[0], normal[1], normal[2], d])
+        return fit_planes(points, np.zeros(len(points), dtype=np.int64), 1)[0]
@@ -0,0 +1,78 @@
+# Copyright (c) 2024, Gonzalo Ferrer, Dmitrii Iarosh, Anastasiia Kornilova
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from dataset_loaders import IclTumCompatLoader as loader_module
+from dataset_loaders.CameraParameters import CameraParameters
+from plane_extractor.plane_extractor import colors_to_labels, extract_planes_from_labels, extract_planes_from_pcd_colors
+
+MIN_POINTS_COUNT = 10
+
+
+@pytest.fixture
+def images():
+    rng = np.random.default_rng(0)
+    height, width = 24, 32
+    depth = rng.integers(1000, 5000, size=(height, width)).astype(np.uint16)
+    depth[:3] = 0
+
+    colors = np.zeros((height, width, 3), dtype=np.uint8)
+    colors[:, :8] = (200, 10, 30)
+    colors[:, 8:16] = (255, 0, 0)
+    colors[:, 16:24] = (10, 20, 30)
+    colors[:12, 24:] = (40, 50, 60)
+    colors[5, 5] = (200, 10, 0)
+    return depth, colors
+
+
+@pytest.fixture
+def loader(images, monkeypatch):
+    depth, colors = images
+    paths = {'depth.png': depth, 'labels.png': colors}
+    monkeypatch.setattr(loader_module, '_read_image', lambda path: paths[str(path)])
+    camera = CameraParameters(width=32, height=24, cx=15.5, cy=11.5, fx=30.0, fy=30.0, scale=1000)
+    return loader_module.IclTumCompatLoader(camera)
+
+
+def test_label_and_color_paths_extract_same_planes(images, loader):
+    depth, colors = images
+    points, labels = loader.load_points_and_labels('depth.png', 'labels.png')
+    from_labels = extract_planes_from_labels(points, labels, MIN_POINTS_COUNT)
+
+    point_cloud = SimpleNamespace(points=points, colors=colors[depth > 0] / 255)
+    from_colors = extract_planes_from_pcd_colors(point_cloud, MIN_POINTS_COUNT)
+    from_colors = {
+        int(colors_to_labels(np.asarray([color]))[0]): plane_points for color, plane_points in from_colors.items()
+    }
+
+    assert sorted(from_labels) == sorted(from_colors) == [0x0A141E, 0x28323C, 0xC80A1E]
+    for label, plane_points in from_labels.items():
+        np.testing.assert_array_equal(plane_points, from_colors[label])
+
+
+def test_plane_statistics_match_label_path(loader):
+    points, labels = loader.load_points_and_labels('depth.png', 'labels.png')
+    from_labels = extract_planes_from_labels(points, labels, MIN_POINTS_COUNT)
+    statistics = loader.load_plane_statistics('depth.png', 'labels.png', MIN_POINTS_COUNT)
+
+    assert sorted(statistics) == sorted(from_labels)
+    for label, plane_points in from_labels.items():
+        assert not statistics[label].has_points
+        np.testing.assert_allclose(statistics[label].S[:3, :3], plane_points.T @ plane_points)
+        np.testing.assert_allclose(statistics[label].S[:3, 3], plane_points.sum(axis=0))
+        assert statistics[label].points_count == len(plane_points)